@@ -0,0 +1,83 @@
+"""Escalado de text_cleaning.clean_html_descriptions con el número de procesos.
+
+Multiplica las descripciones de benchmarks/fixtures/descriptions hasta
+--count (cada copia distinta, como ofertas diferentes) y mide cuántas
+descripciones por segundo se limpian en el propio proceso y con un pool de
+1, 2, 4... procesos (hasta el número de núcleos, o los de --processes). El
+arranque de cada pool no se cuenta: es una vez por worker. Con --chunk-size
+se prueban también distintos tamaños de bloque (0 = automático). La caché
+de textos limpios se desactiva para medir siempre la limpieza completa.
+
+Uso: python benchmarks/bench_clean_pool.py [--count N] [--processes N ...] [--chunk-size N ...] [--repeat N]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("CLEAN_CACHE_SIZE", "0")
+os.environ.setdefault("CLEAN_PARALLEL_MIN", "1")
+
+import text_cleaning
+from text_cleaning import clean_html_descriptions
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "descriptions")
+
+def build_descriptions(count):
+    fixtures = []
+    for name in sorted(os.listdir(FIXTURES_DIR)):
+        with open(os.path.join(FIXTURES_DIR, name), 'r', encoding='utf-8') as f:
+            fixtures.append(f.read())
+    return [f"{fixtures[i % len(fixtures)]}<p>r{i}</p>" for i in range(count)]
+
+def default_processes():
+    cores = os.cpu_count() or 1
+    counts = [1]
+    while counts[-1] * 2 <= cores:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != cores:
+        counts.append(cores)
+    return counts
+
+def best_time(func, repeat):
+    best = None
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - started_at
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description="Escalado de la limpieza de descripciones con procesos")
+    parser.add_argument("--count", type=int, default=4000, help="descripciones por lote")
+    parser.add_argument("--processes", type=int, nargs="+", default=None, help="tamaños de pool a probar")
+    parser.add_argument("--chunk-size", type=int, nargs="+", default=[0], help="descripciones por envío (0 = automático)")
+    parser.add_argument("--repeat", type=int, default=3, help="repeticiones de cada medida (se toma la mejor)")
+    args = parser.parse_args()
+
+    texts = build_descriptions(args.count)
+    megabytes = sum(len(text.encode('utf-8')) for text in texts) / 2**20
+    print(f"{args.count} descripciones ({megabytes:.1f} MiB), {os.cpu_count()} núcleos")
+    print(f"{'modo':<24}{'desc/s':>10}{'MiB/s':>9}{'speedup':>9}")
+
+    inline = best_time(lambda: clean_html_descriptions(texts, processes=0), args.repeat)
+    print(f"{'propio proceso':<24}{args.count / inline:>10.0f}{megabytes / inline:>9.2f}{1:>8.2f}x")
+    expected = clean_html_descriptions(texts, processes=0)
+
+    for processes in args.processes or default_processes():
+        # Arranque del pool fuera de la medida
+        clean_html_descriptions(texts[:processes], processes=processes)
+        for chunk_size in args.chunk_size:
+            text_cleaning.CLEAN_CHUNK_SIZE = chunk_size
+            elapsed = best_time(lambda: clean_html_descriptions(texts, processes=processes), args.repeat)
+            label = f"{processes} procesos" + (f", bloque {chunk_size}" if chunk_size else "")
+            print(f"{label:<24}{args.count / elapsed:>10.0f}{megabytes / elapsed:>9.2f}{inline / elapsed:>8.2f}x")
+        if clean_html_descriptions(texts, processes=processes) != expected:
+            print(f"El resultado con {processes} procesos no coincide con el del propio proceso", file=sys.stderr)
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
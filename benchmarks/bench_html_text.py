@@ -0,0 +1,68 @@
+"""Paridad y rendimiento de text_cleaning.clean_html_description frente a BeautifulSoup.
+
+Para cada descripción de benchmarks/fixtures/descriptions comprueba que el
+texto obtenido es idéntico al de la implementación anterior basada en
+BeautifulSoup(..., 'html.parser').get_text(separator='\\n') y mide el tiempo
+medio por descripción de ambas, sin caché y con la caché por contenido ya
+caliente (lo que cuesta una descripción que no ha cambiado entre refrescos).
+Sale con código 1 si alguna no coincide.
+
+Uso: python benchmarks/bench_html_text.py [repeticiones]
+"""
+import inspect
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+from text_cleaning import clean_text, clean_html_description
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "descriptions")
+
+def bs4_clean_html_description(html_text):
+    """Implementación original, usada como referencia"""
+    if not html_text:
+        return ""
+    soup = BeautifulSoup(html_text, 'html.parser')
+    return clean_text(soup.get_text(separator='\n'))
+
+def load_fixtures():
+    fixtures = []
+    for name in sorted(os.listdir(FIXTURES_DIR)):
+        with open(os.path.join(FIXTURES_DIR, name), 'r', encoding='utf-8') as f:
+            fixtures.append((name, f.read()))
+    return fixtures
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    fixtures = load_fixtures()
+    # Sin caché ni métricas: la función de limpieza tal cual
+    uncached = inspect.unwrap(clean_html_description)
+    mismatches = 0
+    total_old = total_new = total_memo = 0.0
+
+    print(f"{'fixture':<28}{'bytes':>8}{'bs4 (µs)':>12}{'nuevo (µs)':>12}{'speedup':>10}{'caché (µs)':>12}  paridad")
+    for name, html_text in fixtures:
+        expected = bs4_clean_html_description(html_text)
+        result = clean_html_description(html_text)
+        same = expected == result
+        if not same:
+            mismatches += 1
+
+        old = min(timeit.repeat(lambda: bs4_clean_html_description(html_text), number=repeat, repeat=3)) / repeat
+        new = min(timeit.repeat(lambda: uncached(html_text), number=repeat, repeat=3)) / repeat
+        memo = min(timeit.repeat(lambda: clean_html_description(html_text), number=repeat, repeat=3)) / repeat
+        total_old += old
+        total_new += new
+        total_memo += memo
+        print(f"{name:<28}{len(html_text):>8}{old * 1e6:>12.1f}{new * 1e6:>12.1f}{old / new:>9.1f}x{memo * 1e6:>12.1f}  {'OK' if same else 'DIFERENTE'}")
+
+    print(f"{'total':<28}{'':>8}{total_old * 1e6:>12.1f}{total_new * 1e6:>12.1f}{total_old / total_new:>9.1f}x{total_memo * 1e6:>12.1f}")
+    if mismatches:
+        print(f"{mismatches} descripciones no coinciden con BeautifulSoup", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Memoria de los trabajos en caché: dicts tal cual frente a compactados con job_record.compact_jobs.
+
+Genera --jobs trabajos con los scrapers a partir de los fixtures de
+benchmarks/fixtures/feeds (servidos en local como en bench_parsers.py),
+los guarda como JSON igual que una instantánea de job_store y mide con
+tracemalloc cuánto ocupa la lista leída de ese JSON (lo que carga cada
+worker) sin compactar y compactada. También mide lo que cuesta compactar la
+lista y serializarla con el JSON de Flask en ambos casos, y comprueba que el
+JSON resultante es idéntico.
+
+Uso: python benchmarks/bench_job_record.py [--jobs N]
+"""
+import argparse
+import gc
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# server se importa solo por su JSON: sin planificador y con un almacén temporal
+os.environ.setdefault("SCHEDULER_ENABLED", "0")
+os.environ.setdefault("JOB_STORE_PATH", os.path.join(tempfile.mkdtemp(prefix="bench_job_record_"), "jobs.db"))
+
+from bench_parsers import BENCH_SOURCES, build_payloads, start_server, point_sources_to
+
+from job_record import compact_jobs
+from server import app
+
+def scraped_jobs(count):
+    """count trabajos de todas las fuentes (dicts, tal cual los generan los scrapers)"""
+    # Cada fixture tiene 4 ofertas por fuente; jobscollider repite las suyas en dos categorías
+    scale = math.ceil(count / (4 * len(BENCH_SOURCES)))
+    server = start_server(build_payloads(scale))
+    point_sources_to(f"http://127.0.0.1:{server.server_port}")
+    jobs = []
+    for _, _, scraper in BENCH_SOURCES.values():
+        jobs.extend(scraper() or [])
+    server.shutdown()
+    return jobs[:count]
+
+def traced_size(build):
+    """Bytes que siguen reservados tras build() (lo que ocupa el resultado) y el resultado"""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, result
+
+def best_time(func, repeat=5, setup=None):
+    """Mejor tiempo de func() (o func(setup()), sin contar setup)"""
+    best = None
+    for _ in range(repeat):
+        args = (setup(),) if setup else ()
+        started_at = time.perf_counter()
+        func(*args)
+        elapsed = time.perf_counter() - started_at
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description="Memoria de los trabajos en caché: dicts frente a compactados")
+    parser.add_argument("--jobs", type=int, default=10000, help="número de trabajos")
+    args = parser.parse_args()
+
+    sys.stderr = open(os.devnull, 'w')
+    snapshot = json.dumps(scraped_jobs(args.jobs), ensure_ascii=False)
+    count = len(json.loads(snapshot))
+
+    dict_size, dicts = traced_size(lambda: json.loads(snapshot))
+    compact_size, compacted = traced_size(lambda: compact_jobs(json.loads(snapshot)))
+    # compact_jobs interna en los propios dicts: cada repetición compacta una lista recién leída
+    compact_time = best_time(compact_jobs, setup=lambda: json.loads(snapshot))
+
+    with app.app_context():
+        dict_body = app.json.dumps(dicts)
+        compact_body = app.json.dumps(compacted)
+        dict_json_time = best_time(lambda: app.json.dumps(dicts))
+        compact_json_time = best_time(lambda: app.json.dumps(compacted))
+
+    per_10k = 10000 / count
+    print(f"{count} trabajos (leídos del JSON de una instantánea)")
+    print(f"{'':<14}{'MiB':>10}{'bytes/trabajo':>16}{'MiB por 10k':>14}{'JSON (ms)':>12}")
+    print(f"{'dict':<14}{dict_size / 2**20:>10.2f}{dict_size / count:>16.0f}{dict_size * per_10k / 2**20:>14.2f}{dict_json_time * 1000:>12.1f}")
+    print(f"{'compactado':<14}{compact_size / 2**20:>10.2f}{compact_size / count:>16.0f}{compact_size * per_10k / 2**20:>14.2f}{compact_json_time * 1000:>12.1f}")
+    print(f"ahorro: {(dict_size - compact_size) * per_10k / 2**20:.2f} MiB por 10k trabajos "
+          f"({(1 - compact_size / dict_size) * 100:.0f}%); compactar {count} trabajos: {compact_time * 1000:.1f} ms")
+    if dict_body != compact_body:
+        print("El JSON de los trabajos compactados no coincide con el de los dicts", file=sys.__stderr__)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
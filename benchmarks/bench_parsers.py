@@ -0,0 +1,302 @@
+"""Rendimiento de los scrapers sin red: feeds grabados servidos desde un servidor HTTP local.
+
+Cada fixture de benchmarks/fixtures/feeds se multiplica (--scale copias de
+sus ofertas, con enlaces, ids y descripciones distintos en cada copia) y se
+sirve desde un servidor en 127.0.0.1 al que se apuntan las URLs de las
+fuentes. Para cada fuente mide:
+
+  jobs/s       trabajos por segundo de get_*_jobs() completo (mejor de --repeat)
+  fetch        descarga del payload
+  parse        parseo del XML (iter_elements) o del JSON, sin extraer campos
+  clean        tiempo dentro de clean_text / clean_html_description
+  dates        tiempo dentro del parseo de fechas
+  peak         pico de memoria (tracemalloc) de get_*_jobs()
+
+clean y dates se miden en la misma ejecución que da jobs/s. En jobscollider
+los feeds de las categorías se procesan en varios hilos y esos tiempos son
+la suma de todos ellos, así que pueden superar al total.
+
+y lo compara con benchmarks/baseline.json. Las cifras absolutas dependen de
+la máquina: la línea base debe regenerarse (--save-baseline) en la misma
+máquina donde se comparan los cambios. La caché de textos limpios y el GET
+condicional se desactivan para medir siempre el trabajo completo.
+
+Uso: python benchmarks/bench_parsers.py [--scale N] [--repeat N] [--source NOMBRE ...]
+                                        [--save-baseline] [--max-regression PCT]
+"""
+import argparse
+import functools
+import http.server
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Antes de importar los scrapers: sin caché de limpieza, sin caché en disco, sin límites por host
+os.environ.setdefault("CLEAN_CACHE_SIZE", "0")
+os.environ.setdefault("CONDITIONAL_GET", "0")
+os.environ.setdefault("FEED_CACHE_DIR", tempfile.mkdtemp(prefix="bench_feed_cache_"))
+os.environ.setdefault("RATE_LIMIT_PER_HOST", "0")
+os.environ.setdefault("HTTP_RETRIES", "0")
+
+import sources
+import remoteok_data
+import jobcollider_feed_data
+from aijobs_feed_data import get_aijobs_jobs
+from remotive_feed_data import get_remotive_jobs
+from jobicy_feed_data import get_jobicy_jobs
+from weworkremotely_feed_data import get_weworkremotely_jobs
+from remoteok_data import get_remoteok_jobs
+from jobcollider_feed_data import get_jobscollider_jobs
+from fetcher import fetch_feed
+from feed_parser import iter_elements
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FEEDS_DIR = os.path.join(BENCH_DIR, "fixtures", "feeds")
+BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+
+# fuente -> (fixture, etiqueta de cada oferta o None si es JSON, scraper)
+BENCH_SOURCES = {
+    "aijobs": ("aijobs.xml", "item", get_aijobs_jobs),
+    "remotive": ("remotive.xml", "item", get_remotive_jobs),
+    "jobicy": ("jobicy.xml", "job", get_jobicy_jobs),
+    "weworkremotely": ("weworkremotely.xml", "item", get_weworkremotely_jobs),
+    "jobscollider": ("jobscollider.xml", "item", get_jobscollider_jobs),
+    "remoteok": ("remoteok.json", None, get_remoteok_jobs),
+}
+# jobscollider se sirve como dos categorías con el mismo feed para que actúe la deduplicación
+JOBSCOLLIDER_CATEGORIES = ("software_development", "devops")
+
+def _mark_item(item, copy):
+    """Hace única una copia de una oferta XML: sufijo en título, link/guid/id y descripción.
+
+    Sin el sufijo en el título la deduplicación fusionaría todas las copias.
+    El guid lleva el sufijo sin guion porque remotive y jobscollider toman
+    como id lo que va detrás del último guion.
+    """
+    item = re.sub(r"</(title|name|link)>", rf"-r{copy}</\1>", item)
+    item = re.sub(r"</guid>", rf"r{copy}</guid>", item)
+    item = re.sub(r'id="([^"]*)"', rf'id="\1-r{copy}"', item, count=1)
+    return re.sub(r"(\]\]>)?</description>", lambda m: f" (r{copy}){m.group(1) or ''}</description>", item, count=1)
+
+def scale_xml(payload, item_tag, scale):
+    """Repite las ofertas del feed scale veces manteniendo la cabecera y el cierre originales"""
+    matches = list(re.finditer(rf"<{item_tag}[\s>].*?</{item_tag}>", payload, re.S))
+    head, tail = payload[:matches[0].start()], payload[matches[-1].end():]
+    items = [m.group(0) for m in matches]
+    body = "\n".join(item if copy == 0 else _mark_item(item, copy) for copy in range(scale) for item in items)
+    return head + body + tail
+
+def scale_json(payload, scale):
+    data = json.loads(payload)
+    jobs = []
+    for copy in range(scale):
+        for job in data[1:]:
+            job = dict(job)
+            if copy:
+                job["id"] = f"{job['id']}-r{copy}"
+                job["position"] = f"{job['position']}-r{copy}"
+                job["url"] = f"{job['url']}-r{copy}"
+                job["description"] = f"{job['description']} (r{copy})"
+            jobs.append(job)
+    return json.dumps(data[:1] + jobs, ensure_ascii=False)
+
+def build_payloads(scale):
+    payloads = {}
+    for name, (fixture, item_tag, _) in BENCH_SOURCES.items():
+        with open(os.path.join(FEEDS_DIR, fixture), 'r', encoding='utf-8') as f:
+            payload = f.read()
+        payload = scale_json(payload, scale) if item_tag is None else scale_xml(payload, item_tag, scale)
+        payloads[name] = payload.encode('utf-8')
+    return payloads
+
+def start_server(payloads):
+    """Servidor HTTP local que sirve /<fuente> (y /jobscollider/<categoría>) desde memoria"""
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            body = payloads.get(self.path.strip("/").split("/")[0])
+            if body is None:
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def point_sources_to(base_url):
+    """Sustituye las URLs reales por las del servidor local"""
+    for name in sources.REGISTRY:
+        sources.REGISTRY[name]["url"] = f"{base_url}/{name}"
+    remoteok_data.URL = f"{base_url}/remoteok"
+    jobcollider_feed_data.FEEDS = [(category, f"{base_url}/jobscollider/{category}") for category in JOBSCOLLIDER_CATEGORIES]
+
+def source_urls(name):
+    if name == "jobscollider":
+        return [url for _, url in jobcollider_feed_data.FEEDS]
+    if name == "remoteok":
+        return [remoteok_data.URL]
+    return [sources.REGISTRY[name]["url"]]
+
+class StageTimer:
+    """Acumula el tiempo pasado dentro de las funciones envueltas, por etapa (sumando todos los hilos)"""
+
+    def __init__(self):
+        self.totals = {}
+        self._lock = threading.Lock()
+
+    def wrap(self, stage, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started_at = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started_at
+                with self._lock:
+                    self.totals[stage] = self.totals.get(stage, 0.0) + elapsed
+        return wrapper
+
+def instrumented_run(scraper):
+    """Ejecuta el scraper con la limpieza y el parseo de fechas cronometrados.
+
+    Devuelve (trabajos, segundos totales, segundos por etapa).
+    """
+    timer = StageTimer()
+    originals = {
+        (sources, "clean_text"): sources.clean_text,
+        (sources, "clean_html_description"): sources.clean_html_description,
+        (sources, "_date_parser"): sources._date_parser,
+        (remoteok_data, "clean_text"): remoteok_data.clean_text,
+        (remoteok_data, "clean_html_description"): remoteok_data.clean_html_description,
+        (remoteok_data, "parse_date"): remoteok_data.parse_date,
+    }
+    extractors = dict(sources._extractors)
+    try:
+        for (module, attr), func in originals.items():
+            if attr == "_date_parser":
+                setattr(module, attr, lambda *args, func=func: timer.wrap("dates", func(*args)))
+            else:
+                setattr(module, attr, timer.wrap("dates" if attr == "parse_date" else "clean", func))
+        # Los extractores resuelven sus transformaciones al compilarse
+        sources._extractors = {name: sources.compile_extractor(config) for name, config in sources.REGISTRY.items()}
+        started_at = time.perf_counter()
+        jobs = scraper() or []
+        elapsed = time.perf_counter() - started_at
+    finally:
+        for (module, attr), func in originals.items():
+            setattr(module, attr, func)
+        sources._extractors = extractors
+    return jobs, elapsed, timer.totals
+
+def bench_source(name, repeat):
+    _, item_tag, scraper = BENCH_SOURCES[name]
+    urls = source_urls(name)
+
+    started_at = time.perf_counter()
+    payloads = [fetch_feed(url)[0] for url in urls]
+    fetch = time.perf_counter() - started_at
+
+    started_at = time.perf_counter()
+    for payload in payloads:
+        if item_tag is None:
+            json.loads(payload)
+        else:
+            for _ in iter_elements(payload, item_tag):
+                pass
+    parse = time.perf_counter() - started_at
+
+    best = None
+    for _ in range(repeat):
+        jobs, elapsed, totals = instrumented_run(scraper)
+        if best is None or elapsed < best:
+            best, stages = elapsed, totals
+
+    tracemalloc.start()
+    scraper()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "jobs": len(jobs),
+        "jobs_per_sec": round(len(jobs) / best, 1) if best else 0.0,
+        "total_ms": round(best * 1000, 2),
+        "fetch_ms": round(fetch * 1000, 2),
+        "parse_ms": round(parse * 1000, 2),
+        "clean_ms": round(stages.get("clean", 0.0) * 1000, 2),
+        "dates_ms": round(stages.get("dates", 0.0) * 1000, 2),
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+def _change(current, previous):
+    if not previous:
+        return ""
+    return f"{(current - previous) / previous * 100:+.1f}%"
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark offline de los scrapers")
+    parser.add_argument("--scale", type=int, default=100, help="copias de las ofertas de cada fixture")
+    parser.add_argument("--repeat", type=int, default=3, help="repeticiones de la medida de jobs/s")
+    parser.add_argument("--source", action="append", choices=sorted(BENCH_SOURCES), help="solo estas fuentes")
+    parser.add_argument("--save-baseline", action="store_true", help="guarda los resultados como línea base")
+    parser.add_argument("--max-regression", type=float, default=None,
+                        help="sale con código 1 si jobs/s cae más de este porcentaje frente a la línea base")
+    args = parser.parse_args()
+
+    # Los logs de los scrapers (Intentando RSS..., Procesados...) no interesan aquí
+    sys.stderr = open(os.devnull, 'w')
+    server = start_server(build_payloads(args.scale))
+    point_sources_to(f"http://127.0.0.1:{server.server_port}")
+
+    baseline = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    if baseline and baseline.get("scale") != args.scale:
+        print(f"Aviso: la línea base se midió con --scale {baseline.get('scale')}", file=sys.__stderr__)
+    baseline_sources = baseline.get("sources", {})
+
+    results = {}
+    regressions = []
+    print(f"{'fuente':<16}{'jobs':>7}{'jobs/s':>10}{'vs base':>9}{'fetch':>9}{'parse':>9}{'clean':>9}{'dates':>9}{'pico KiB':>10}{'vs base':>9}")
+    for name in args.source or BENCH_SOURCES:
+        result = bench_source(name, args.repeat)
+        results[name] = result
+        previous = baseline_sources.get(name, {})
+        print(f"{name:<16}{result['jobs']:>7}{result['jobs_per_sec']:>10.0f}{_change(result['jobs_per_sec'], previous.get('jobs_per_sec')):>9}"
+              f"{result['fetch_ms']:>7.1f}ms{result['parse_ms']:>7.1f}ms{result['clean_ms']:>7.1f}ms{result['dates_ms']:>7.1f}ms"
+              f"{result['peak_kib']:>10.0f}{_change(result['peak_kib'], previous.get('peak_kib')):>9}")
+        if args.max_regression is not None and previous.get("jobs_per_sec"):
+            if result["jobs_per_sec"] < previous["jobs_per_sec"] * (1 - args.max_regression / 100):
+                regressions.append(name)
+    server.shutdown()
+
+    if args.save_baseline:
+        baseline_sources.update(results)
+        with open(BASELINE_PATH, 'w', encoding='utf-8') as f:
+            json.dump({"scale": args.scale, "python": sys.version.split()[0], "sources": baseline_sources}, f, indent=2)
+            f.write("\n")
+        print(f"Línea base guardada en {BASELINE_PATH}")
+    if regressions:
+        print(f"Regresión de más del {args.max_regression}% en: {', '.join(regressions)}", file=sys.__stderr__)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
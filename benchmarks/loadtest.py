@@ -0,0 +1,292 @@
+"""Prueba de carga de server:app bajo gunicorn contra un upstream simulado.
+
+Levanta un servidor HTTP local por portal que sirve los fixtures de
+benchmarks/fixtures/feeds (multiplicados con --scale, como bench_parsers.py)
+con la latencia y la tasa de errores indicadas. Para cada combinación de
+--worker-class y --workers arranca gunicorn como en el Procfile, pero con
+benchmarks/loadtest_app.py como punto de entrada para que las fuentes apunten
+al simulador, y con una base de datos y una caché de feeds nuevas. Tras una
+petición de calentamiento por ruta, --concurrency clientes con keep-alive
+recorren las rutas durante --duration segundos. Por configuración informa de
+latencia p50/p95/p99, peticiones por segundo y porcentaje de errores (5xx,
+timeouts y conexiones fallidas), en total y por ruta.
+
+Cada portal simulado escucha en su propia dirección de loopback
+(127.0.1.N) para que el rate limit y los circuit breakers, que son por host,
+se comporten como en producción; si el sistema no lo permite todos
+comparten 127.0.0.1. Los clientes corren en este mismo proceso: con muchos
+workers conviene comprobar que la máquina no se satura (--concurrency alto
+puede medir al cliente en vez de al servidor).
+
+Uso: python benchmarks/loadtest.py [--worker-class sync gthread] [--workers 1 2 4] [--threads N]
+                                   [--concurrency N] [--duration S] [--route RUTA ...]
+                                   [--upstream-latency MS] [--upstream-jitter MS]
+                                   [--upstream-error-rate FRAC] [--scale N]
+                                   [--env CLAVE=VALOR ...] [--json FICHERO]
+"""
+import argparse
+import http.client
+import http.server
+import importlib.util
+import json
+import math
+import os
+import random
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+# Entorno de gunicorn: el de la shell, antes de que bench_parsers fije sus valores de benchmark
+BASE_ENV = dict(os.environ)
+
+sys.path.insert(0, BENCH_DIR)
+from bench_parsers import BENCH_SOURCES, build_payloads
+
+DEFAULT_ROUTES = [
+    "/jobs/aijobs",
+    "/jobs/remotivejobs",
+    "/jobs/remoteokjobs",
+    "/jobs/jobicyjobs",
+    "/jobs/weworkremotelyjobs",
+    "/jobs/jobscolliderjobs",
+    "/jobs/remotivejobs?type=full_time&limit=20&fields=title,link",
+    "/jobs/all?limit=50",
+    "/jobs/search?q=python",
+]
+# Clases de worker que necesitan un paquete aparte
+WORKER_PACKAGES = {"gevent": "gevent", "eventlet": "eventlet", "tornado": "tornado"}
+
+def start_upstreams(payloads, latency, jitter, error_rate):
+    """Un servidor simulado por portal; devuelve ({fuente: URL base}, [servidores])"""
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            delay = max(0.0, random.gauss(latency, jitter)) if jitter else latency
+            time.sleep(delay / 1000)
+            body = payloads.get(self.path.strip("/").split("/")[0])
+            if body is None or random.random() < error_rate:
+                self.send_response(404 if body is None else 503)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    upstreams = {}
+    servers = []
+    for index, name in enumerate(BENCH_SOURCES, start=1):
+        try:
+            server = http.server.ThreadingHTTPServer((f"127.0.1.{index}", 0), Handler)
+        except OSError:
+            server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        host, port = server.server_address[:2]
+        upstreams[name] = f"http://{host}:{port}"
+        servers.append(server)
+    return upstreams, servers
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def request(connection, port, path, timeout):
+    """GET con la conexión dada (se abre otra si hace falta); devuelve (conexión, estado o None, segundos)"""
+    started_at = time.perf_counter()
+    try:
+        if connection is None:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=timeout)
+        connection.request("GET", path)
+        response = connection.getresponse()
+        response.read()
+        status = response.status
+        if response.will_close:
+            connection.close()
+            connection = None
+    except (OSError, http.client.HTTPException):
+        if connection is not None:
+            connection.close()
+        connection, status = None, None
+    return connection, status, time.perf_counter() - started_at
+
+def start_gunicorn(worker_class, workers, threads, port, upstreams, workdir, extra_env, timeout):
+    env = dict(BASE_ENV)
+    env.update({
+        "LOADTEST_UPSTREAMS": json.dumps(upstreams),
+        "JOB_STORE_PATH": os.path.join(workdir, "jobs.db"),
+        "FEED_CACHE_DIR": os.path.join(workdir, "feed_cache"),
+        "PYTHONUNBUFFERED": "1",
+    })
+    env.update(extra_env)
+    command = [sys.executable, "-m", "gunicorn", "-b", f"127.0.0.1:{port}", "-k", worker_class,
+               "-w", str(workers), "--timeout", str(int(timeout)), "--chdir", workdir,
+               "--pythonpath", BENCH_DIR, "loadtest_app:app"]
+    if worker_class == "gthread":
+        command[-1:-1] = ["--threads", str(threads)]
+    log = open(os.path.join(workdir, "gunicorn.log"), "w")
+    return subprocess.Popen(command, env=env, stdout=log, stderr=subprocess.STDOUT), log
+
+def wait_ready(process, port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            return False
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            connection.request("GET", "/")
+            ready = connection.getresponse().status == 200
+            connection.close()
+            if ready:
+                return True
+        except OSError:
+            pass
+        time.sleep(0.2)
+    return False
+
+def run_clients(port, routes, concurrency, duration, timeout):
+    """--concurrency hilos pidiendo las rutas en bucle; devuelve {ruta: [(estado, segundos)]}"""
+    samples = {route: [] for route in routes}
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+
+    def client(offset):
+        connection = None
+        local = []
+        index = offset
+        while time.monotonic() < stop_at:
+            route = routes[index % len(routes)]
+            index += 1
+            connection, status, elapsed = request(connection, port, route, timeout)
+            local.append((route, status, elapsed))
+        if connection is not None:
+            connection.close()
+        with lock:
+            for route, status, elapsed in local:
+                samples[route].append((status, elapsed))
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples
+
+def percentile(sorted_values, pct):
+    """Percentil por rango más cercano"""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, max(0, math.ceil(pct / 100 * len(sorted_values)) - 1))]
+
+def summarize(samples, duration):
+    latencies = sorted(elapsed for _, elapsed in samples)
+    errors = sum(1 for status, _ in samples if status is None or status >= 500)
+    return {
+        "requests": len(samples),
+        "rps": round(len(samples) / duration, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "error_pct": round(errors / len(samples) * 100, 2) if samples else 0.0,
+    }
+
+def print_row(label, summary):
+    print(f"{label:<40}{summary['requests']:>11}{summary['rps']:>9.1f}{summary['p50_ms']:>9.1f}"
+          f"{summary['p95_ms']:>9.1f}{summary['p99_ms']:>9.1f}{summary['error_pct']:>8.2f}%")
+
+def run_config(args, worker_class, workers, upstreams):
+    port = free_port()
+    workdir = tempfile.mkdtemp(prefix="loadtest_")
+    extra_env = dict(item.split("=", 1) for item in args.env)
+    process, log = start_gunicorn(worker_class, workers, args.threads, port, upstreams, workdir,
+                                  extra_env, args.request_timeout)
+    try:
+        if not wait_ready(process, port):
+            print(f"gunicorn no arrancó ({worker_class} x{workers}); ver {workdir}/gunicorn.log", file=sys.stderr)
+            return None
+        # Calentamiento: una petición por ruta para que las fuentes estén cargadas
+        for route in args.route:
+            request(None, port, route, args.request_timeout)
+        samples = run_clients(port, args.route, args.concurrency, args.duration, args.request_timeout)
+    finally:
+        process.send_signal(signal.SIGTERM)
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+        log.close()
+    shutil.rmtree(workdir, ignore_errors=True)
+    result = summarize([sample for route_samples in samples.values() for sample in route_samples], args.duration)
+    result["routes"] = {route: summarize(route_samples, args.duration) for route, route_samples in samples.items()}
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga de server:app bajo gunicorn")
+    parser.add_argument("--worker-class", nargs="+", default=["sync", "gthread"], help="clases de worker de gunicorn")
+    parser.add_argument("--workers", nargs="+", type=int, default=[1, 2, 4], help="número de workers a probar")
+    parser.add_argument("--threads", type=int, default=4, help="hilos por worker con gthread")
+    parser.add_argument("--concurrency", type=int, default=16, help="clientes simultáneos")
+    parser.add_argument("--duration", type=float, default=10, help="segundos de carga por configuración")
+    parser.add_argument("--route", action="append", help="ruta a pedir (repetible; por defecto todas las /jobs/*)")
+    parser.add_argument("--request-timeout", type=float, default=60, help="timeout de cada petición y de los workers")
+    parser.add_argument("--upstream-latency", type=float, default=50, help="latencia media del upstream en ms")
+    parser.add_argument("--upstream-jitter", type=float, default=0, help="desviación típica de la latencia en ms")
+    parser.add_argument("--upstream-error-rate", type=float, default=0, help="fracción de respuestas 503 del upstream")
+    parser.add_argument("--scale", type=int, default=10, help="copias de las ofertas de cada fixture (tamaño del payload)")
+    parser.add_argument("--env", action="append", default=[], metavar="CLAVE=VALOR",
+                        help="variable de entorno para el servidor (ej. SCHEDULER_ENABLED=0)")
+    parser.add_argument("--json", help="guarda los resultados en este fichero")
+    args = parser.parse_args()
+    args.route = args.route or DEFAULT_ROUTES
+
+    available = []
+    for worker_class in args.worker_class:
+        package = WORKER_PACKAGES.get(worker_class)
+        if package and importlib.util.find_spec(package) is None:
+            print(f"Se omite {worker_class}: falta el paquete {package}", file=sys.stderr)
+        else:
+            available.append(worker_class)
+
+    upstreams, servers = start_upstreams(build_payloads(args.scale), args.upstream_latency,
+                                         args.upstream_jitter, args.upstream_error_rate)
+    print(f"upstream: latencia {args.upstream_latency:.0f}±{args.upstream_jitter:.0f} ms, "
+          f"errores {args.upstream_error_rate:.0%}, --scale {args.scale}; "
+          f"{args.concurrency} clientes durante {args.duration:.0f} s")
+    print(f"{'configuración / ruta':<40}{'peticiones':>11}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errores':>9}")
+
+    results = []
+    for worker_class in available:
+        for workers in args.workers:
+            label = f"{worker_class} x{workers}" + (f" ({args.threads} hilos)" if worker_class == "gthread" else "")
+            result = run_config(args, worker_class, workers, upstreams)
+            if result is None:
+                continue
+            print_row(label, result)
+            for route, summary in result["routes"].items():
+                print_row(f"  {route}", summary)
+            results.append(dict(result, worker_class=worker_class, workers=workers,
+                                threads=args.threads if worker_class == "gthread" else 1))
+
+    for server in servers:
+        server.shutdown()
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({"config": {key: value for key, value in vars(args).items() if key != "json"},
+                       "results": results}, f, indent=2)
+            f.write("\n")
+        print(f"Resultados guardados en {args.json}")
+
+if __name__ == "__main__":
+    main()
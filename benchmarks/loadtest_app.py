@@ -0,0 +1,27 @@
+"""Punto de entrada de gunicorn para benchmarks/loadtest.py: server:app contra el upstream simulado.
+
+LOADTEST_UPSTREAMS es un JSON {fuente: URL base} con la dirección del
+servidor simulado de cada portal. Las URLs se sustituyen antes de importar
+server para que ni el scheduler llegue a contactar con los portales reales.
+"""
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sources
+import remoteok_data
+import jobcollider_feed_data
+
+UPSTREAMS = json.loads(os.environ["LOADTEST_UPSTREAMS"])
+
+for name in sources.REGISTRY:
+    if name != "jobscollider":
+        sources.REGISTRY[name]["url"] = f"{UPSTREAMS[name]}/{name}"
+remoteok_data.URL = f"{UPSTREAMS['remoteok']}/remoteok"
+# Las mismas categorías que en producción, todas servidas por el simulador de jobscollider
+jobcollider_feed_data.FEEDS = [(category, f"{UPSTREAMS['jobscollider']}/jobscollider/{category}")
+                               for category, _ in jobcollider_feed_data.FEEDS]
+
+from server import app
@@ -0,0 +1,100 @@
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+# Configuración por variables de entorno (segundos / número de entradas)
+CACHE_TTL = float(os.getenv("CACHE_TTL", "300"))
+CACHE_STALE_TTL = float(os.getenv("CACHE_STALE_TTL", "900"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "16"))
+
+# clave -> (valor, instante en que se guardó)
+_entries = OrderedDict()
+_refreshing = set()
+_lock = threading.Lock()
+
+def get_ttl(key):
+    """TTL de una fuente: CACHE_TTL_<CLAVE> si existe, si no CACHE_TTL"""
+    return float(os.getenv(f"CACHE_TTL_{key.upper()}", CACHE_TTL))
+
+def get_stale_ttl(key):
+    """Ventana stale-while-revalidate: CACHE_STALE_TTL_<CLAVE> si existe, si no CACHE_STALE_TTL"""
+    return float(os.getenv(f"CACHE_STALE_TTL_{key.upper()}", CACHE_STALE_TTL))
+
+def _store(key, value):
+    """Guarda un valor y expulsa las entradas menos usadas si se supera el límite"""
+    with _lock:
+        _entries[key] = (value, time.monotonic())
+        _entries.move_to_end(key)
+        while len(_entries) > CACHE_MAX_ENTRIES:
+            _entries.popitem(last=False)
+
+def _refresh(key, loader):
+    """Recarga una entrada en segundo plano; si falla se sigue sirviendo el valor anterior"""
+    try:
+        value = loader()
+        if value:
+            _store(key, value)
+        else:
+            print(f"Refresco de caché sin datos para {key}, se mantiene el valor anterior", file=sys.stderr)
+    except Exception as e:
+        print(f"Error refrescando caché de {key}: {e}", file=sys.stderr)
+    finally:
+        with _lock:
+            _refreshing.discard(key)
+
+def peek(key):
+    """Valor guardado si aún está dentro del TTL o de la ventana stale (sin cargar nada); None si no"""
+    with _lock:
+        entry = _entries.get(key)
+    if entry is None or time.monotonic() - entry[1] >= get_ttl(key) + get_stale_ttl(key):
+        return None
+    return entry[0]
+
+def put(key, value):
+    """Guarda un valor obtenido fuera de get_or_load (por ejemplo, al terminar un streaming)"""
+    if value:
+        _store(key, value)
+
+def get_or_load(key, loader):
+    """Devuelve (valor, estado) donde estado es 'HIT', 'STALE' o 'MISS'.
+
+    Dentro del TTL se sirve directamente; dentro de la ventana stale se sirve el
+    valor guardado y se lanza un refresco en segundo plano; fuera de ella se
+    llama a loader() de forma síncrona. Los resultados vacíos no se guardan.
+    """
+    now = time.monotonic()
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None:
+            _entries.move_to_end(key)
+    if entry is not None:
+        value, stored_at = entry
+        age = now - stored_at
+        if age < get_ttl(key):
+            return value, "HIT"
+        if age < get_ttl(key) + get_stale_ttl(key):
+            with _lock:
+                start = key not in _refreshing
+                _refreshing.add(key)
+            if start:
+                threading.Thread(target=_refresh, args=(key, loader), daemon=True).start()
+            return value, "STALE"
+
+    value = loader()
+    if value:
+        _store(key, value)
+        return value, "MISS"
+    if entry is not None:
+        # La fuente ha fallado: mejor devolver datos caducados que un error
+        return entry[0], "STALE"
+    return value, "MISS"
+
+def invalidate(key=None):
+    """Elimina una entrada (o todas si key es None)"""
+    with _lock:
+        if key is None:
+            _entries.clear()
+        else:
+            _entries.pop(key, None)
@@ -0,0 +1,112 @@
+import os
+import threading
+import time
+from collections import deque
+from urllib.parse import urlparse
+
+import requests
+
+# Fallos seguidos que abren el circuito y segundos que permanece abierto antes de probar de nuevo
+BREAKER_FAILURES = int(os.getenv("BREAKER_FAILURES", "5"))
+BREAKER_RESET = float(os.getenv("BREAKER_RESET", "60"))
+# Timeout adaptativo: ADAPTIVE_TIMEOUT_FACTOR * p95 de las últimas latencias, entre el mínimo y el timeout pedido
+ADAPTIVE_TIMEOUT_FACTOR = float(os.getenv("ADAPTIVE_TIMEOUT_FACTOR", "3"))
+ADAPTIVE_TIMEOUT_MIN = float(os.getenv("ADAPTIVE_TIMEOUT_MIN", "2"))
+# Latencias que se guardan por host y mínimo necesario para adaptar el timeout
+LATENCY_WINDOW = int(os.getenv("LATENCY_WINDOW", "50"))
+LATENCY_MIN_SAMPLES = int(os.getenv("LATENCY_MIN_SAMPLES", "5"))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """El circuito del host está abierto: la petición se rechaza sin llegar a salir"""
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+class CircuitBreaker:
+    """Circuit breaker de un host con timeout adaptado a sus latencias recientes.
+
+    Tras BREAKER_FAILURES fallos seguidos se abre y rechaza las peticiones
+    durante BREAKER_RESET segundos; después deja pasar una sola de prueba
+    (semiabierto) que lo cierra si va bien o lo vuelve a abrir si falla.
+    """
+
+    def __init__(self, host):
+        self.host = host
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.lock = threading.Lock()
+
+    def allow(self):
+        """True si la petición puede salir"""
+        with self.lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.opened_at >= BREAKER_RESET:
+                self.state = HALF_OPEN
+                self.probing = False
+            if self.state == HALF_OPEN and not self.probing:
+                self.probing = True
+                return True
+            return False
+
+    def timeout(self, limit):
+        """Timeout para la próxima petición, nunca mayor que limit"""
+        with self.lock:
+            if len(self.latencies) < LATENCY_MIN_SAMPLES:
+                return limit
+            p95 = _percentile(self.latencies, 0.95)
+        return min(limit, max(ADAPTIVE_TIMEOUT_MIN, p95 * ADAPTIVE_TIMEOUT_FACTOR))
+
+    def record_success(self, latency):
+        with self.lock:
+            self.latencies.append(latency)
+            self.failures = 0
+            self.state = CLOSED
+            self.probing = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.probing = False
+            if self.state == HALF_OPEN or self.failures >= BREAKER_FAILURES:
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+    def status(self):
+        with self.lock:
+            latencies = list(self.latencies)
+            status = {"state": self.state, "failures": self.failures}
+            if self.state == OPEN:
+                status["retry_in"] = round(max(0, BREAKER_RESET - (time.monotonic() - self.opened_at)), 1)
+        if latencies:
+            status["p50"] = round(_percentile(latencies, 0.5), 3)
+            status["p95"] = round(_percentile(latencies, 0.95), 3)
+        status["samples"] = len(latencies)
+        return status
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+def get_breaker(url):
+    """Devuelve (creándolo si hace falta) el circuit breaker del host de una URL"""
+    host = urlparse(url).hostname
+    with _breakers_lock:
+        breaker = _breakers.get(host)
+        if breaker is None:
+            breaker = CircuitBreaker(host)
+            _breakers[host] = breaker
+        return breaker
+
+def breaker_status():
+    """Estado de los circuitos de todos los hosts para el health check"""
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.host: breaker.status() for breaker in breakers}
@@ -0,0 +1,234 @@
+import hashlib
+import os
+import re
+import unicodedata
+from collections import defaultdict
+
+from job_store import job_key
+
+# Parámetros de MinHash/LSH: NUM_BANDS * ROWS_PER_BAND valores por descripción
+NUM_BANDS = 16
+ROWS_PER_BAND = 4
+NUM_HASHES = NUM_BANDS * ROWS_PER_BAND
+SHINGLE_SIZE = 3
+# Similitud mínima (Jaccard estimada) entre descripciones para considerar duplicados
+DEDUP_SIMILARITY = float(os.getenv("DEDUP_SIMILARITY", "0.8"))
+# Similitud mínima (Jaccard de palabras) entre títulos para que cuente la de las descripciones
+DEDUP_TITLE_SIMILARITY = float(os.getenv("DEDUP_TITLE_SIMILARITY", "0.5"))
+
+_WORD_RE = re.compile(r"\w+")
+# Empresas "desconocidas" que ponen los scrapers por defecto
+_UNKNOWN_COMPANIES = {"", "empresa no especificada"}
+_COMPANY_SUFFIXES = {"inc", "llc", "ltd", "gmbh", "corp", "co", "sl", "sa", "bv", "ag"}
+
+def normalize(text):
+    """Minúsculas, sin acentos ni puntuación y con los espacios colapsados"""
+    text = unicodedata.normalize('NFKD', text or "")
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(_WORD_RE.findall(text.casefold()))
+
+def normalize_company(company):
+    """Nombre de empresa normalizado sin sufijos societarios ('' si es desconocida)"""
+    company = normalize(company)
+    if company in _UNKNOWN_COMPANIES:
+        return ""
+    words = company.split()
+    while len(words) > 1 and words[-1] in _COMPANY_SUFFIXES:
+        words.pop()
+    return " ".join(words)
+
+def normalize_title(job):
+    """Título normalizado sin la empresa ('Title at Company', 'Company: Title')"""
+    title = normalize(job.get("title"))
+    for name in (normalize(job.get("company")), normalize_company(job.get("company"))):
+        if name and name in title:
+            words = title.replace(name, " ").split()
+            if words and words[-1] == "at":
+                words.pop()
+            return " ".join(words)
+    return title
+
+def fingerprint(job):
+    """Huella título+empresa; devuelve None si el trabajo no tiene título"""
+    title = normalize_title(job)
+    if not title:
+        return None
+    return f"{title}|{normalize_company(job.get('company'))}"
+
+def title_similarity(words_a, words_b):
+    """Jaccard entre los conjuntos de palabras de dos títulos (0 si alguno está vacío)"""
+    if not words_a or not words_b:
+        return 0.0
+    return len(words_a & words_b) / len(words_a | words_b)
+
+def minhash(text):
+    """Firma MinHash de una descripción con una sola permutación (una pasada por shingle).
+
+    Cada shingle se hashea una vez con blake2b de 64 bits (estable entre
+    procesos, a diferencia de hash(), que cambia con PYTHONHASHSEED) y cae en
+    uno de NUM_HASHES compartimentos donde se guarda el mínimo; los
+    compartimentos vacíos se rellenan con el siguiente lleno. Devuelve None si
+    el texto no tiene palabras.
+    """
+    words = _WORD_RE.findall((text or "").casefold())
+    if not words:
+        return None
+    if len(words) < SHINGLE_SIZE:
+        shingles = {" ".join(words)}
+    else:
+        shingles = {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+    bins = [None] * NUM_HASHES
+    for shingle in shingles:
+        h = int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'big')
+        index = h % NUM_HASHES
+        value = h // NUM_HASHES
+        if bins[index] is None or value < bins[index]:
+            bins[index] = value
+    # Densificación: cada compartimento vacío toma el valor del siguiente lleno (circularmente)
+    signature = list(bins)
+    following = None
+    for step in reversed(range(2 * NUM_HASHES)):
+        i = step % NUM_HASHES
+        if bins[i] is not None:
+            following = (bins[i], i)
+        elif step < NUM_HASHES:
+            signature[i] = (following[0], (following[1] - i) % NUM_HASHES)
+    return tuple(signature)
+
+def similarity(sig_a, sig_b):
+    """Jaccard estimada entre dos firmas MinHash"""
+    return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / NUM_HASHES
+
+def _find(parents, i):
+    while parents[i] != i:
+        parents[i] = parents[parents[i]]
+        i = parents[i]
+    return i
+
+def _union(parents, keys, companies, a, b):
+    """Une los grupos de a y b salvo que tengan trabajos distintos de una misma fuente o empresas distintas.
+
+    keys guarda, para cada raíz, la clave de trabajo de cada fuente del
+    grupo y companies la empresa conocida del grupo ('' si no tiene).
+    """
+    root_a, root_b = _find(parents, a), _find(parents, b)
+    if root_a == root_b:
+        return
+    if companies[root_a] and companies[root_b] and companies[root_a] != companies[root_b]:
+        return
+    small, large = sorted((keys[root_a], keys[root_b]), key=len)
+    if any(large.get(source, key) != key for source, key in small.items()):
+        return
+    # El grupo conserva como raíz el trabajo que apareció antes
+    root, child = min(root_a, root_b), max(root_a, root_b)
+    parents[child] = root
+    large.update(small)
+    keys[root] = large
+    keys[child] = None
+    companies[root] = companies[root] or companies[child]
+
+def find_duplicate_groups(jobs):
+    """Agrupa los índices de trabajos duplicados.
+
+    Son duplicados los trabajos de una fuente con la misma clave (job_key),
+    los que comparten huella título+empresa con la empresa conocida y los
+    que tienen títulos con similitud >= DEDUP_TITLE_SIMILARITY y
+    descripciones con similitud >= DEDUP_SIMILARITY. Nunca se juntan en un
+    grupo dos trabajos de la misma fuente con claves distintas ni dos
+    empresas conocidas distintas. Los candidatos salen de LSH sobre MinHash,
+    así que el coste crece de forma casi lineal con el número de trabajos.
+    """
+    parents = list(range(len(jobs)))
+    keys = []
+    companies = []
+    titles = []
+    by_key = {}
+    by_fingerprint = {}
+    buckets = defaultdict(list)
+    signatures = []
+
+    for i, job in enumerate(jobs):
+        source_key = (job.get("source"), job_key(job))
+        keys.append(dict([source_key]))
+        company = normalize_company(job.get("company"))
+        companies.append(company)
+        title = normalize_title(job)
+        titles.append(set(title.split()))
+        if source_key in by_key:
+            _union(parents, keys, companies, by_key[source_key], i)
+        else:
+            by_key[source_key] = i
+        if company and title:
+            fp = f"{title}|{company}"
+            if fp in by_fingerprint:
+                _union(parents, keys, companies, by_fingerprint[fp], i)
+            else:
+                by_fingerprint[fp] = i
+        signature = minhash(job.get("description"))
+        signatures.append(signature)
+        if signature is None:
+            continue
+        for band in range(NUM_BANDS):
+            buckets[(band, signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND])].append(i)
+
+    for members in buckets.values():
+        if len(members) < 2:
+            continue
+        # Cada trabajo se compara con el primero de cada título distinto del compartimento
+        representatives = [members[0]]
+        for other in members[1:]:
+            for first in representatives:
+                if _find(parents, first) == _find(parents, other):
+                    break
+                if title_similarity(titles[first], titles[other]) < DEDUP_TITLE_SIMILARITY:
+                    continue
+                if similarity(signatures[first], signatures[other]) >= DEDUP_SIMILARITY:
+                    _union(parents, keys, companies, first, other)
+                break
+            else:
+                representatives.append(other)
+
+    groups = defaultdict(list)
+    for i in range(len(jobs)):
+        groups[_find(parents, i)].append(i)
+    return list(groups.values())
+
+def _union_lists(jobs, field):
+    merged = []
+    for job in jobs:
+        for value in job.get(field) or []:
+            if value not in merged:
+                merged.append(value)
+    return merged
+
+def merge_jobs(jobs):
+    """Fusiona un grupo de duplicados en el primero.
+
+    Une las listas category y tags, y guarda en duplicates el source, link e
+    id_source de cada copia con un link distinto al del trabajo principal.
+    """
+    merged = dict(jobs[0])
+    for field in ("category", "tags"):
+        if any(field in job for job in jobs):
+            merged[field] = _union_lists(jobs, field)
+    seen_links = {merged.get("link")}
+    duplicates = []
+    for job in jobs[1:]:
+        if job.get("link") in seen_links:
+            continue
+        seen_links.add(job.get("link"))
+        duplicate = {"source": job.get("source"), "link": job.get("link")}
+        if job.get("id_source"):
+            duplicate["id_source"] = job["id_source"]
+        duplicates.append(duplicate)
+    if duplicates:
+        merged["duplicates"] = duplicates
+    return merged
+
+def dedup_jobs(jobs):
+    """Devuelve la lista sin duplicados, conservando el orden de primera aparición"""
+    if not jobs:
+        return jobs
+    groups = find_duplicate_groups(jobs)
+    groups.sort(key=lambda group: group[0])
+    return [jobs[group[0]] if len(group) == 1 else merge_jobs([jobs[i] for i in group]) for group in groups]
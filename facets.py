@@ -0,0 +1,144 @@
+"""Recuentos por faceta (source, type, location, tags, category y fecha) mantenidos al cargar cada fuente.
+
+Los contadores se guardan por fuente y por día de publicación, así que una
+consulta filtrada por fuente y/o rango de fechas solo suma los contadores de
+esos grupos: el coste depende del número de días y valores distintos, no del
+número de trabajos. Al actualizar una fuente solo se tocan los contadores de
+los trabajos nuevos, modificados o que ya no aparecen (que caducan con ella).
+"""
+import threading
+from collections import Counter
+from datetime import date as Date
+
+from job_store import job_key
+
+# Facetas que se cuentan a partir de los campos de cada trabajo (los campos lista cuentan cada elemento)
+FIELD_FACETS = ("type", "location", "tags", "category")
+# Todas las facetas que puede devolver facet_counts
+FACETS = ("source",) + FIELD_FACETS + ("date",)
+# Agrupaciones de la faceta date
+DATE_BUCKETS = ("day", "week", "month")
+
+_lock = threading.RLock()
+# fuente -> {clave del trabajo: (fecha, valores de sus facetas)}
+_source_entries = {}
+# fuente -> {fecha: {"jobs": n, faceta: Counter}}
+_counts = {}
+
+def _job_entry(job):
+    """(fecha, ((faceta, valor), ...)) de un trabajo; los valores vacíos no se cuentan"""
+    values = []
+    for facet in FIELD_FACETS:
+        value = job.get(facet)
+        if isinstance(value, list):
+            values.extend((facet, str(item)) for item in dict.fromkeys(value) if item)
+        elif value:
+            values.append((facet, str(value)))
+    return job.get("date") or "", tuple(values)
+
+def _apply(counts, entry, delta):
+    day, values = entry
+    bucket = counts.get(day)
+    if bucket is None:
+        bucket = counts[day] = {"jobs": 0}
+    bucket["jobs"] += delta
+    for facet, value in values:
+        counter = bucket.get(facet)
+        if counter is None:
+            counter = bucket[facet] = Counter()
+        counter[value] += delta
+        if counter[value] <= 0:
+            del counter[value]
+    if bucket["jobs"] <= 0:
+        del counts[day]
+
+def update_source(source, jobs):
+    """Sincroniza los recuentos con la última lista de trabajos de una fuente.
+
+    Devuelve (añadidos o modificados, eliminados).
+    """
+    current = {}
+    for job in jobs:
+        current[job_key(job)] = _job_entry(job)
+    changed = removed = 0
+    with _lock:
+        previous = _source_entries.get(source, {})
+        counts = _counts.setdefault(source, {})
+        for key, entry in previous.items():
+            if current.get(key) != entry:
+                _apply(counts, entry, -1)
+                removed += key not in current
+        for key, entry in current.items():
+            if previous.get(key) != entry:
+                _apply(counts, entry, 1)
+                changed += 1
+        _source_entries[source] = current
+    return changed, removed
+
+def facet_sources():
+    """Fuentes que ya tienen recuentos"""
+    with _lock:
+        return set(_source_entries)
+
+def _date_bucket(day, bucket):
+    """Clave de la fecha 'YYYY-MM-DD' en la agrupación pedida ('' si no tiene fecha válida)"""
+    if not day or bucket == "day":
+        return day
+    if bucket == "month":
+        return day[:7]
+    try:
+        year, week, _ = Date.fromisoformat(day).isocalendar()
+    except ValueError:
+        return ""
+    return f"{year}-W{week:02d}"
+
+def facet_counts(sources=None, date=None, date_from=None, date_to=None, facets=None, limit=None, date_bucket="day"):
+    """Recuentos por faceta de los trabajos que cumplen los filtros.
+
+    sources es una lista de fuentes (sin distinguir mayúsculas); date,
+    date_from y date_to filtran por fecha 'YYYY-MM-DD' igual que job_query
+    (con rango, los trabajos sin fecha quedan fuera). facets limita las
+    facetas devueltas y limit los valores de cada una, de mayor a menor
+    recuento (la faceta date va de la fecha más reciente a la más antigua).
+    Devuelve {"total": n, "facets": {faceta: [{"value": valor, "count": n}, ...]}}.
+    """
+    facets = facets or FACETS
+    totals = {facet: Counter() for facet in facets}
+    total = 0
+    with _lock:
+        for source, counts in _counts.items():
+            if sources is not None and source.casefold() not in sources:
+                continue
+            for day, bucket in counts.items():
+                if date and day != date:
+                    continue
+                if date_from and day < date_from:
+                    continue
+                if date_to and not "" < day <= date_to:
+                    continue
+                total += bucket["jobs"]
+                if "source" in totals:
+                    totals["source"][source] += bucket["jobs"]
+                if "date" in totals:
+                    totals["date"][_date_bucket(day, date_bucket)] += bucket["jobs"]
+                for facet in FIELD_FACETS:
+                    if facet in totals and facet in bucket:
+                        totals[facet].update(bucket[facet])
+
+    result = {}
+    for facet, counter in totals.items():
+        if facet == "date":
+            items = sorted(counter.items(), reverse=True)[:limit]
+        else:
+            items = counter.most_common(limit)
+        result[facet] = [{"value": value, "count": count} for value, count in items]
+    return {"total": total, "facets": result}
+
+def facet_stats():
+    """Fuentes, trabajos y grupos (fuente, día) con recuentos"""
+    with _lock:
+        return {
+            "sources": len(_source_entries),
+            "jobs": sum(len(entries) for entries in _source_entries.values()),
+            "buckets": sum(len(counts) for counts in _counts.values()),
+        }
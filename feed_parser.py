@@ -0,0 +1,44 @@
+import time
+import xml.etree.ElementTree as ET
+
+import metrics
+
+def _drain(parser, stack, tag):
+    """Procesa los eventos pendientes del parser devolviendo los elementos <tag> terminados"""
+    for event, elem in parser.read_events():
+        if event == 'start':
+            stack.append(elem)
+            continue
+        stack.pop()
+        if elem.tag == tag:
+            yield elem
+            # Una vez procesado se desengancha del árbol para que pueda liberarse
+            if stack:
+                stack[-1].remove(elem)
+            elem.clear()
+
+def iter_elements(chunks, tag, source=None):
+    """Parsea un XML de forma incremental y va devolviendo cada elemento <tag> completo.
+
+    chunks puede ser un iterable de bloques de bytes o un único bloque. La
+    memoria usada depende del tamaño de un elemento, no del feed entero.
+    Lanza ET.ParseError si el XML está mal formado. Con source, el tiempo
+    dentro del parser (sin la descarga ni el consumidor) se registra en
+    metrics.PARSE_SECONDS con esa etiqueta.
+    """
+    if isinstance(chunks, (bytes, str)):
+        chunks = [chunks]
+    parser = ET.XMLPullParser(events=('start', 'end'))
+    stack = []
+    parse_time = 0.0
+    for chunk in chunks:
+        started_at = time.perf_counter()
+        parser.feed(chunk)
+        parse_time += time.perf_counter() - started_at
+        yield from _drain(parser, stack, tag)
+    started_at = time.perf_counter()
+    parser.close()
+    parse_time += time.perf_counter() - started_at
+    yield from _drain(parser, stack, tag)
+    if source is not None:
+        metrics.PARSE_SECONDS.observe(parse_time, source)
@@ -0,0 +1,259 @@
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError, TimeoutError as Urllib3TimeoutError
+from urllib3.util.retry import Retry
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+
+from circuit_breaker import CircuitOpenError, get_breaker
+import metrics
+
+# Directorio donde se guardan validadores, cuerpos crudos y trabajos ya procesados
+FEED_CACHE_DIR = os.getenv("FEED_CACHE_DIR", ".feed_cache")
+# CONDITIONAL_GET=0 desactiva el GET condicional y la caché en disco
+CONDITIONAL_GET = os.getenv("CONDITIONAL_GET", "1") != "0"
+# Tamaño de los bloques leídos en modo streaming
+STREAM_CHUNK_SIZE = int(os.getenv("STREAM_CHUNK_SIZE", "65536"))
+# Pools keep-alive: número de hosts con pool propio y conexiones abiertas por host
+HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "10"))
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "8"))
+# Reintentos ante errores de conexión, 429 y 5xx con espera exponencial
+# (HTTP_BACKOFF * 2^n segundos más hasta HTTP_BACKOFF_JITTER de aleatorio);
+# los tiempos de espera agotados no se reintentan (ver _Retry)
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "3"))
+HTTP_BACKOFF = float(os.getenv("HTTP_BACKOFF", "0.5"))
+HTTP_BACKOFF_JITTER = float(os.getenv("HTTP_BACKOFF_JITTER", "0.5"))
+HTTP_BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX", "10"))
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_session = None
+_session_lock = threading.Lock()
+
+class _Retry(Retry):
+    """Retry que no repite las peticiones cuyo tiempo de conexión o de lectura se agota.
+
+    Un host colgado costaría (HTTP_RETRIES + 1) veces el timeout más las
+    esperas, y el circuit breaker solo contaría un fallo. Los errores de
+    conexión rápidos (conexión rechazada, DNS...) sí se reintentan.
+    """
+
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        if isinstance(error, Urllib3TimeoutError) and not isinstance(error, NewConnectionError):
+            raise error
+        return super().increment(method, url, response, error, _pool, _stacktrace)
+
+def get_session():
+    """Sesión HTTP compartida por todos los scrapers del proceso.
+
+    Reutiliza las conexiones TCP/TLS con cada host y reintenta las peticiones
+    fallidas; respeta Retry-After en los 429/503. Si se agotan los reintentos
+    se devuelve la última respuesta y raise_for_status decide.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            retry = _Retry(
+                total=HTTP_RETRIES,
+                status_forcelist=RETRY_STATUSES,
+                allowed_methods=frozenset(["GET", "HEAD"]),
+                backoff_factor=HTTP_BACKOFF,
+                backoff_jitter=HTTP_BACKOFF_JITTER,
+                backoff_max=HTTP_BACKOFF_MAX,
+                respect_retry_after_header=True,
+                raise_on_status=False,
+            )
+            adapter = HTTPAdapter(pool_connections=HTTP_POOL_CONNECTIONS, pool_maxsize=HTTP_POOL_MAXSIZE, max_retries=retry)
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+def _cache_paths(url):
+    """Rutas (meta, cuerpo, trabajos) de la caché en disco de una URL"""
+    base = os.path.join(FEED_CACHE_DIR, hashlib.sha1(url.encode('utf-8')).hexdigest())
+    return base + ".meta.json", base + ".body", base + ".jobs.json"
+
+def _tmp_path(path):
+    """Ruta temporal única por proceso e hilo"""
+    return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+def _write_atomic(path, data):
+    """Escribe un fichero de forma atómica para que otros workers nunca lean uno a medias"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = _tmp_path(path)
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def _read_json(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _read_bytes(path):
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except OSError:
+        return None
+
+def _iter_file(path):
+    """Lee un fichero por bloques"""
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(STREAM_CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+def _iter_response(response, url, validators, host):
+    """Recorre el cuerpo por bloques y, si hay validadores, lo va copiando a disco.
+
+    El cuerpo y los validadores solo se publican cuando la descarga se ha
+    consumido entera; si el consumidor se detiene antes se descarta la copia.
+    """
+    meta_path, body_path, _ = _cache_paths(url)
+    tmp_path = None
+    tmp_file = None
+    size = 0
+    try:
+        if validators:
+            try:
+                os.makedirs(FEED_CACHE_DIR, exist_ok=True)
+                tmp_path = _tmp_path(body_path)
+                tmp_file = open(tmp_path, 'wb')
+            except OSError as e:
+                print(f"No se pudo guardar la caché de {url}: {e}", file=sys.stderr)
+        for chunk in response.iter_content(STREAM_CHUNK_SIZE):
+            size += len(chunk)
+            if tmp_file is not None:
+                tmp_file.write(chunk)
+            yield chunk
+        if tmp_file is not None:
+            tmp_file.close()
+            tmp_file = None
+            os.replace(tmp_path, body_path)
+            tmp_path = None
+            _write_atomic(meta_path, json.dumps(dict(validators, url=url)).encode('utf-8'))
+    finally:
+        response.close()
+        metrics.FETCH_BYTES.observe(size, host)
+        if tmp_file is not None:
+            tmp_file.close()
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def fetch_feed(url, headers=None, timeout=10, stream=False):
+    """Descarga un feed con GET condicional (If-None-Match / If-Modified-Since).
+
+    Devuelve (contenido, trabajos_guardados). Si el servidor responde 304 y el
+    feed ya se procesó, contenido es None y trabajos_guardados es la lista
+    guardada con save_parsed_jobs. En otro caso contenido son los bytes del
+    feed (o un iterador de bloques si stream=True) y trabajos_guardados es
+    None. Lanza las mismas excepciones que requests.get + raise_for_status
+    (tras los reintentos de get_session). timeout es el máximo: el circuit
+    breaker del host lo ajusta según sus latencias recientes.
+    """
+    headers = dict(headers or {})
+    meta_path, body_path, jobs_path = _cache_paths(url)
+    meta = _read_json(meta_path) if CONDITIONAL_GET else None
+
+    # Solo se envían validadores si tenemos el cuerpo con el que se corresponden
+    if meta and os.path.exists(body_path):
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+    # Con el circuito del host abierto no se sale a la red: se sirven los
+    # últimos trabajos procesados si los hay o se falla inmediatamente
+    breaker = get_breaker(url)
+    if not breaker.allow():
+        jobs = _read_json(jobs_path)
+        if jobs is not None:
+            print(f"Circuito abierto para {breaker.host}, se sirven los últimos trabajos guardados: {url}", file=sys.stderr)
+            return None, jobs
+        raise CircuitOpenError(f"Circuito abierto para {breaker.host}: {url}")
+
+    started_at = time.monotonic()
+    try:
+        response = get_session().get(url, headers=headers, timeout=breaker.timeout(timeout), stream=stream)
+    except requests.exceptions.RequestException as e:
+        breaker.record_failure()
+        metrics.FETCH_SECONDS.observe(time.monotonic() - started_at, breaker.host, type(e).__name__)
+        raise
+    elapsed = time.monotonic() - started_at
+    metrics.FETCH_SECONDS.observe(elapsed, breaker.host, str(response.status_code))
+    if response.status_code >= 500 or response.status_code == 429:
+        breaker.record_failure()
+    else:
+        breaker.record_success(elapsed)
+    try:
+        response.raise_for_status()
+    except requests.exceptions.HTTPError:
+        response.close()
+        raise
+
+    if response.status_code == 304:
+        response.close()
+        jobs = _read_json(jobs_path)
+        if jobs is not None:
+            print(f"Feed sin cambios (304): {url}", file=sys.stderr)
+            return None, jobs
+        if os.path.exists(body_path):
+            return (_iter_file(body_path) if stream else _read_bytes(body_path)), None
+        raise requests.exceptions.HTTPError(f"304 sin copia local para {url}", response=response)
+
+    if response.status_code != 200:
+        response.close()
+        raise requests.exceptions.HTTPError(f"Respuesta inesperada {response.status_code} para {url}", response=response)
+
+    validators = None
+    if CONDITIONAL_GET:
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if etag or last_modified:
+            validators = {"etag": etag, "last_modified": last_modified}
+        try:
+            # Los trabajos procesados del cuerpo anterior dejan de ser válidos
+            if os.path.exists(jobs_path):
+                os.remove(jobs_path)
+            if validators is None and os.path.exists(meta_path):
+                os.remove(meta_path)
+        except OSError as e:
+            print(f"No se pudo limpiar la caché de {url}: {e}", file=sys.stderr)
+
+    if stream:
+        return _iter_response(response, url, validators, breaker.host), None
+
+    metrics.FETCH_BYTES.observe(len(response.content), breaker.host)
+    if validators is not None:
+        try:
+            _write_atomic(body_path, response.content)
+            _write_atomic(meta_path, json.dumps(dict(validators, url=url)).encode('utf-8'))
+        except OSError as e:
+            print(f"No se pudo guardar la caché de {url}: {e}", file=sys.stderr)
+
+    return response.content, None
+
+def save_parsed_jobs(url, jobs):
+    """Guarda los trabajos procesados de un feed para reutilizarlos ante un 304"""
+    meta_path, _, jobs_path = _cache_paths(url)
+    # Sin validadores nunca llegará un 304, así que no merece la pena escribirlos
+    if not CONDITIONAL_GET or not os.path.exists(meta_path):
+        return
+    try:
+        # json.dump escribe por partes y evita tener en memoria el JSON completo
+        tmp_path = _tmp_path(jobs_path)
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(jobs, f, ensure_ascii=False)
+        os.replace(tmp_path, jobs_path)
+    except OSError as e:
+        print(f"No se pudieron guardar los trabajos de {url}: {e}", file=sys.stderr)
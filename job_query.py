@@ -0,0 +1,84 @@
+# Parámetros de consulta soportados por las rutas /jobs/*:
+#   source, type            lista separada por comas, coincidencia exacta (sin distinguir mayúsculas)
+#   location                subcadena, sin distinguir mayúsculas
+#   date, date_from, date_to fecha YYYY-MM-DD exacta o rango inclusivo
+#   fields                  lista de campos a devolver (ej. title,link,company,date)
+#   limit, offset           paginación
+
+from itertools import islice
+
+def _split(value):
+    return [part.strip().casefold() for part in value.split(",") if part.strip()]
+
+def _parse_int(args, name, default):
+    value = args.get(name)
+    if value is None or value == "":
+        return default
+    number = int(value)
+    if number < 0:
+        raise ValueError(f"{name} no puede ser negativo")
+    return number
+
+def build_filter(args):
+    """Construye la función de filtrado a partir de los parámetros de la petición (None si no hay filtros)"""
+    checks = []
+    sources = _split(args.get("source", ""))
+    if sources:
+        checks.append(lambda job: str(job.get("source", "")).casefold() in sources)
+    types = _split(args.get("type", ""))
+    if types:
+        checks.append(lambda job: str(job.get("type", "")).casefold() in types)
+    location = args.get("location", "").strip().casefold()
+    if location:
+        checks.append(lambda job: location in str(job.get("location", "")).casefold())
+    date = args.get("date", "").strip()
+    if date:
+        checks.append(lambda job: job.get("date") == date)
+    date_from = args.get("date_from", "").strip()
+    if date_from:
+        checks.append(lambda job: (job.get("date") or "") >= date_from)
+    date_to = args.get("date_to", "").strip()
+    if date_to:
+        checks.append(lambda job: "" < (job.get("date") or "") <= date_to)
+    if not checks:
+        return None
+    return lambda job: all(check(job) for check in checks)
+
+def apply_query(jobs, args):
+    """Filtra, pagina y proyecta una lista de trabajos antes de serializarla.
+
+    Devuelve (trabajos, total) donde total es el número de trabajos que
+    cumplen los filtros antes de paginar. Lanza ValueError si limit u
+    offset no son enteros válidos.
+    """
+    limit = _parse_int(args, "limit", None)
+    offset = _parse_int(args, "offset", 0)
+    matches = build_filter(args)
+    if matches is not None:
+        jobs = [job for job in jobs if matches(job)]
+    total = len(jobs)
+    if offset or limit is not None:
+        jobs = jobs[offset:None if limit is None else offset + limit]
+    fields = [field.strip() for field in args.get("fields", "").split(",") if field.strip()]
+    if fields:
+        jobs = [{field: job[field] for field in fields if field in job} for job in jobs]
+    return jobs, total
+
+def iter_query(jobs, args):
+    """Versión perezosa de apply_query para respuestas en streaming.
+
+    Recibe cualquier iterable de trabajos y devuelve un generador que filtra,
+    pagina y proyecta según se consume (sin total). Los parámetros se
+    validan antes de empezar: lanza ValueError igual que apply_query.
+    """
+    limit = _parse_int(args, "limit", None)
+    offset = _parse_int(args, "offset", 0)
+    matches = build_filter(args)
+    fields = [field.strip() for field in args.get("fields", "").split(",") if field.strip()]
+    if matches is not None:
+        jobs = filter(matches, jobs)
+    if offset or limit is not None:
+        jobs = islice(jobs, offset, None if limit is None else offset + limit)
+    if fields:
+        jobs = ({field: job[field] for field in fields if field in job} for job in jobs)
+    return jobs
@@ -0,0 +1,25 @@
+"""Compactación de los trabajos que se quedan en memoria: se internan los valores repetidos de cada dict."""
+import sys
+
+# Campos con pocos valores distintos cuyas cadenas se internan
+INTERNED_FIELDS = ("date", "company", "location", "type", "source")
+# Campos lista cuyos elementos se internan
+INTERNED_LIST_FIELDS = ("category", "tags")
+
+_intern_string = sys.intern
+
+def compact(job):
+    """Interna en el propio dict los valores repetidos del trabajo y lo devuelve"""
+    for field in INTERNED_FIELDS:
+        value = job.get(field)
+        if type(value) is str:
+            job[field] = _intern_string(value)
+    for field in INTERNED_LIST_FIELDS:
+        value = job.get(field)
+        if type(value) is list:
+            job[field] = [_intern_string(item) if type(item) is str else item for item in value]
+    return job
+
+def compact_jobs(jobs):
+    """Lista de trabajos con sus valores repetidos internados"""
+    return [compact(job) for job in jobs]
@@ -0,0 +1,135 @@
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+# Ruta de la base de datos SQLite compartida por todos los workers
+JOB_STORE_PATH = os.getenv("JOB_STORE_PATH", "jobs.db")
+
+_local = threading.local()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    source TEXT NOT NULL,
+    job_key TEXT NOT NULL,
+    data TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (source, job_key)
+);
+CREATE INDEX IF NOT EXISTS jobs_updated_at ON jobs (updated_at);
+CREATE TABLE IF NOT EXISTS snapshots (
+    source TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    fetched_at REAL NOT NULL
+);
+"""
+
+UPSERT = """
+INSERT INTO jobs (source, job_key, data, content_hash, first_seen, last_seen, updated_at)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (source, job_key) DO UPDATE SET
+    last_seen = excluded.last_seen,
+    data = CASE WHEN jobs.content_hash != excluded.content_hash THEN excluded.data ELSE jobs.data END,
+    updated_at = CASE WHEN jobs.content_hash != excluded.content_hash THEN excluded.updated_at ELSE jobs.updated_at END,
+    content_hash = excluded.content_hash
+"""
+
+def get_connection():
+    """Conexión SQLite propia de cada hilo (sqlite3 no permite compartirlas)"""
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(JOB_STORE_PATH, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        _local.conn = conn
+    return conn
+
+def job_key(job):
+    """Clave única de un trabajo dentro de su fuente: id_source o, si no hay, el link"""
+    return job.get("id_source") or job.get("link") or hashlib.sha1(
+        f"{job.get('title', '')}|{job.get('company', '')}".encode('utf-8')).hexdigest()
+
+def ingest(source, jobs):
+    """Inserta o actualiza los trabajos de una fuente.
+
+    first_seen se fija al insertar, last_seen se renueva en cada ingesta y
+    updated_at solo cambia cuando cambia el contenido del trabajo.
+    Devuelve el número de trabajos procesados.
+    """
+    now = time.time()
+    # Si una clave se repite en la misma ingesta gana la última aparición
+    rows = {}
+    for job in jobs:
+        key = job_key(job)
+        data = json.dumps(job, ensure_ascii=False, sort_keys=True)
+        content_hash = hashlib.blake2b(data.encode('utf-8'), digest_size=16).hexdigest()
+        rows[key] = (source, key, data, content_hash, now, now, now)
+    conn = get_connection()
+    with conn:
+        conn.executemany(UPSERT, rows.values())
+    return len(rows)
+
+def parse_since(value):
+    """Convierte ?since= (segundos epoch o fecha ISO 8601) a segundos epoch; ValueError si no es válido"""
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+def _format_timestamp(ts):
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat(timespec='seconds')
+
+def get_jobs_since(since, source=None):
+    """Trabajos nuevos o modificados después de since (segundos epoch), con sus marcas first_seen/last_seen"""
+    query = "SELECT data, first_seen, last_seen FROM jobs WHERE updated_at > ?"
+    params = [since]
+    if source is not None:
+        query += " AND source = ?"
+        params.append(source)
+    query += " ORDER BY updated_at"
+    jobs = []
+    for data, first_seen, last_seen in get_connection().execute(query, params):
+        job = json.loads(data)
+        job["first_seen"] = _format_timestamp(first_seen)
+        job["last_seen"] = _format_timestamp(last_seen)
+        jobs.append(job)
+    return jobs
+
+def save_snapshot(source, jobs):
+    """Publica la lista completa de trabajos de una fuente para que la lean todos los workers"""
+    conn = get_connection()
+    with conn:
+        conn.execute("INSERT OR REPLACE INTO snapshots (source, data, fetched_at) VALUES (?, ?, ?)",
+                     (source, json.dumps(jobs, ensure_ascii=False), time.time()))
+
+def load_snapshot(source):
+    """Última lista publicada de una fuente: devuelve (trabajos, fetched_at) o (None, None)"""
+    row = get_connection().execute("SELECT data, fetched_at FROM snapshots WHERE source = ?", (source,)).fetchone()
+    if row is None:
+        return None, None
+    return json.loads(row[0]), row[1]
+
+def snapshot_times():
+    """Fecha ISO de la última instantánea de cada fuente"""
+    return {source: _format_timestamp(fetched_at)
+            for source, fetched_at in get_connection().execute("SELECT source, fetched_at FROM snapshots")}
+
+def safe_publish(source, jobs):
+    """Guarda los trabajos en el histórico y como instantánea de la fuente sin propagar errores"""
+    try:
+        ingest(source, jobs)
+        save_snapshot(source, jobs)
+    except sqlite3.Error as e:
+        print(f"Error publicando trabajos de {source}: {e}", file=sys.stderr)
@@ -2,125 +2,151 @@ import requests
 import xml.etree.ElementTree as ET
 import json
 import sys
-import html
-import unicodedata
-from datetime import datetime
-from bs4 import BeautifulSoup
-import time
-import random
+import os
+from concurrent.futures import ThreadPoolExecutor
+from rate_limit import wait_for_host
+import text_cleaning
+from fetcher import save_parsed_jobs
+from sources import iter_feed_jobs, read_raw_feed_jobs, clean_html_fields
+from dedup import dedup_jobs
+from job_store import job_key
+import metrics
 
-# Configurar la salida para usar UTF-8 en Windows
-if sys.platform == "win32":
-    sys.stdout.reconfigure(encoding='utf-8')
+# Lista de feeds por categoría según JobsCollider
+FEEDS = [
+    ("software_development", "https://jobscollider.com/remote-software-development-jobs.rss"),
+    ("cybersecurity", "https://jobscollider.com/remote-cybersecurity-jobs.rss"),
+    ("customer_service", "https://jobscollider.com/remote-customer-service-jobs.rss"),
+    ("design", "https://jobscollider.com/remote-design-jobs.rss"),
+    ("marketing", "https://jobscollider.com/remote-marketing-jobs.rss"),
+    ("sales", "https://jobscollider.com/remote-sales-jobs.rss"),
+    ("product", "https://jobscollider.com/remote-product-jobs.rss"),
+    ("business", "https://jobscollider.com/remote-business-jobs.rss"),
+    ("data", "https://jobscollider.com/remote-data-jobs.rss"),
+    ("devops", "https://jobscollider.com/remote-devops-jobs.rss"),
+    ("finance_legal", "https://jobscollider.com/remote-finance-legal-jobs.rss"),
+    ("human_resources", "https://jobscollider.com/remote-human-resources-jobs.rss"),
+    ("qa", "https://jobscollider.com/remote-qa-jobs.rss"),
+    ("writing", "https://jobscollider.com/remote-writing-jobs.rss"),
+    ("project_management", "https://jobscollider.com/remote-project-management-jobs.rss"),
+    ("all_others", "https://jobscollider.com/remote-all-others-jobs.rss")
+]
 
-def parse_date(pubdate_str):
-    """Convierte una fecha como 'Thu, 06 Mar 2025 03:23:17 +0000' a 'YYYY-MM-DD'"""
+# Número máximo de feeds descargándose a la vez (1 = modo secuencial)
+MAX_WORKERS = int(os.getenv("JOBSCOLLIDER_MAX_WORKERS", "4"))
+
+def fetch_category_jobs(category_name, url):
+    """Descarga y procesa el feed de una categoría (ver sources.REGISTRY['jobscollider']); devuelve [] si falla"""
+    # El token bucket por host sustituye a los sleeps aleatorios entre llamadas
+    wait_for_host(url)
+    jobs = []
     try:
-        dt = datetime.strptime(pubdate_str, "%a, %d %b %Y %H:%M:%S %z")
-        return dt.strftime("%Y-%m-%d")
-    except (ValueError, TypeError):
-        return datetime.now().strftime("%Y-%m-%d")
+        for job in iter_feed_jobs("jobscollider", url=url, context={"category": category_name}):
+            jobs.append(job)
+        print(f"Procesados {len(jobs)} trabajos de {category_name}.", file=sys.stderr)
+    except requests.exceptions.HTTPError as e:
+        print(f"Error HTTP: {e}", file=sys.stderr)
+        return []
+    except ET.ParseError as e:
+        # Se conservan los trabajos leídos antes del error
+        print(f"Error al parsear XML de {url}: {e}", file=sys.stderr)
+    except requests.exceptions.RequestException as e:
+        print(f"Error de conexión leyendo {url}: {e}", file=sys.stderr)
+        return []
+    
+    return jobs
 
-def clean_text(text):
-    """Limpia texto: decodifica HTML, normaliza Unicode y preserva saltos de línea"""
-    if not text:
-        return ""
-    text = html.unescape(text)
-    text = unicodedata.normalize('NFC', text)
-    return text.strip()
+def fetch_category_raw_jobs(category_name, url):
+    """Como fetch_category_jobs pero con las descripciones sin limpiar: devuelve (trabajos, sin_limpiar).
 
-def clean_html_description(html_text):
-    """Convierte HTML a texto plano preservando saltos de línea"""
-    if not html_text:
-        return ""
-    soup = BeautifulSoup(html_text, 'html.parser')
-    return clean_text(soup.get_text(separator='\n'))
+    Ver sources.read_raw_feed_jobs; si falla la descarga devuelve ([], False).
+    """
+    wait_for_host(url)
+    try:
+        jobs, raw = read_raw_feed_jobs("jobscollider", url=url, context={"category": category_name})
+    except requests.exceptions.HTTPError as e:
+        print(f"Error HTTP: {e}", file=sys.stderr)
+        return [], False
+    except ET.ParseError as e:
+        # Como en fetch_category_jobs se conservan los trabajos leídos antes del
+        # error; se limpian aquí y no se guardan en la caché de feeds
+        print(f"Error al parsear XML de {url}: {e}", file=sys.stderr)
+        clean_html_fields("jobscollider", e.jobs)
+        return e.jobs, False
+    except requests.exceptions.RequestException as e:
+        print(f"Error de conexión leyendo {url}: {e}", file=sys.stderr)
+        return [], False
+    print(f"Procesados {len(jobs)} trabajos de {category_name}.", file=sys.stderr)
+    return jobs, raw
 
-def extract_id_from_guid(guid):
-    """Extrae el ID numérico del guid (ej. '451872' de 'https://jobscollider.com/jobs/...-451872')"""
-    if guid and guid.startswith("https://jobscollider.com/jobs/"):
-        return guid.split('-')[-1]
-    return ""
+def _get_batch_cleaned_jobs(max_workers=None):
+    """Trabajos de todas las categorías con las descripciones limpiadas en un solo lote.
 
-def get_jobscollider_jobs():
-    # Lista de feeds por categoría según JobsCollider
-    feeds = [
-        ("software_development", "https://jobscollider.com/remote-software-development-jobs.rss"),
-        ("cybersecurity", "https://jobscollider.com/remote-cybersecurity-jobs.rss"),
-        ("customer_service", "https://jobscollider.com/remote-customer-service-jobs.rss"),
-        ("design", "https://jobscollider.com/remote-design-jobs.rss"),
-        ("marketing", "https://jobscollider.com/remote-marketing-jobs.rss"),
-        ("sales", "https://jobscollider.com/remote-sales-jobs.rss"),
-        ("product", "https://jobscollider.com/remote-product-jobs.rss"),
-        ("business", "https://jobscollider.com/remote-business-jobs.rss"),
-        ("data", "https://jobscollider.com/remote-data-jobs.rss"),
-        ("devops", "https://jobscollider.com/remote-devops-jobs.rss"),
-        ("finance_legal", "https://jobscollider.com/remote-finance-legal-jobs.rss"),
-        ("human_resources", "https://jobscollider.com/remote-human-resources-jobs.rss"),
-        ("qa", "https://jobscollider.com/remote-qa-jobs.rss"),
-        ("writing", "https://jobscollider.com/remote-writing-jobs.rss"),
-        ("project_management", "https://jobscollider.com/remote-project-management-jobs.rss"),
-        ("all_others", "https://jobscollider.com/remote-all-others-jobs.rss")
-    ]
-    
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-    }
-    
+    Cada feed de categoría trae pocas ofertas, muy por debajo de
+    CLEAN_PARALLEL_MIN: limpiándolas juntas el lote sí llega a repartirse en
+    el pool de procesos de text_cleaning.
+    """
+    max_workers = max_workers or MAX_WORKERS
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(lambda feed: fetch_category_raw_jobs(*feed), FEEDS))
+    clean_html_fields("jobscollider", [job for jobs, raw in results if raw for job in jobs])
     all_jobs = []
-    
-    for category_name, url in feeds:
-        try:
-            print(f"Intentando RSS: {url}", file=sys.stderr)
-            response = requests.get(url, headers=headers, timeout=10)
-            response.raise_for_status()
-        except requests.exceptions.HTTPError as e:
-            print(f"Error HTTP: {e}", file=sys.stderr)
-            continue
-        except requests.exceptions.RequestException as e:
-            print(f"Error de conexión: {e}", file=sys.stderr)
-            continue
-        
-        if response.status_code == 200:
-            try:
-                root = ET.fromstring(response.content)
-                for item in root.findall('.//item'):
-                    title = clean_text(item.find('title').text if item.find('title') is not None else "")
-                    company = title.split(' at ', 1)[1] if ' at ' in title else "Empresa no especificada"
-                    guid = item.find('guid').text if item.find('guid') is not None else ""
-                    
-                    job = {
-                        "title": title,
-                        "date": parse_date(item.find('pubDate').text) if item.find('pubDate') is not None else "",
-                        "company": company,
-                        "location": "Not available",
-                        "category": [category_name],
-                        "description": clean_html_description(item.find('description').text if item.find('description') is not None else ""),
-                        "link": clean_text(item.find('link').text if item.find('link') is not None else ""),
-                        "source": "jobscollider",
-                        "id_source": extract_id_from_guid(guid)
-                    }
-                    all_jobs.append(job)
-                
-                print(f"Procesados {len(all_jobs)} trabajos hasta ahora.", file=sys.stderr)
-                
-            except ET.ParseError as e:
-                print(f"Error al parsear XML de {url}: {e}", file=sys.stderr)
-            
-            # Sleep aleatorio entre 0.1 y 0.5 segundos
-            sleep_time = random.uniform(0.1, 0.5)
-            print(f"Esperando {sleep_time:.2f} segundos antes de la siguiente llamada...", file=sys.stderr)
-            time.sleep(sleep_time)
-        else:
-            print(f"Error inesperado: {response.status_code} para {url}", file=sys.stderr)
-    
-    # Imprimir el JSON por salida estándar
-    if all_jobs:
-        print(json.dumps(all_jobs, indent=4, ensure_ascii=False))
+    for (_, url), (jobs, raw) in zip(FEEDS, results):
+        if raw:
+            save_parsed_jobs(url, jobs)
+        all_jobs.extend(jobs)
+    return all_jobs
+
+def _iter_category_jobs(max_workers=None):
+    """Listas de trabajos de cada categoría según terminan sus feeds, en el orden de FEEDS"""
+    max_workers = max_workers or MAX_WORKERS
+    # Los feeds se descargan en paralelo; map conserva el orden de FEEDS
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        yield from executor.map(lambda feed: fetch_category_jobs(*feed), FEEDS)
+
+def iter_jobscollider_jobs(max_workers=None):
+    """Genera los trabajos de todas las categorías sin esperar a que terminen todos los feeds.
+
+    Una oferta que aparece en varias categorías solo se emite la primera vez:
+    para unir sus categorías habría que esperar al último feed. Al terminar
+    devuelve (StopIteration.value) la misma lista que get_jobscollider_jobs,
+    con las categorías unidas, que es la que se debe publicar.
+    """
+    seen = set()
+    all_jobs = []
+    for jobs in _iter_category_jobs(max_workers):
+        all_jobs.extend(jobs)
+        for job in jobs:
+            key = job_key(job)
+            if key not in seen:
+                seen.add(key)
+                yield job
+    return dedup_jobs(all_jobs)
+
+@metrics.scraper("jobscollider")
+def get_jobscollider_jobs(max_workers=None):
+    if text_cleaning.CLEAN_PROCESSES > 0:
+        all_jobs = _get_batch_cleaned_jobs(max_workers)
     else:
-        print("No se encontraron trabajos.", file=sys.stderr)
+        all_jobs = []
+        for jobs in _iter_category_jobs(max_workers):
+            all_jobs.extend(jobs)
+    
+    # Una misma oferta aparece en varias categorías: se fusionan uniendo sus categorías
+    all_jobs = dedup_jobs(all_jobs)
     
     return all_jobs
 
+def main():
+    """Uso desde la línea de comandos: imprime los trabajos en JSON por salida estándar"""
+    # Configurar la salida para usar UTF-8 en Windows
+    if sys.platform == "win32":
+        sys.stdout.reconfigure(encoding='utf-8')
+    jobs = get_jobscollider_jobs()
+    if not jobs:
+        print("No se encontraron trabajos.", file=sys.stderr)
+        sys.exit(1)
+    print(json.dumps(jobs, indent=4, ensure_ascii=False))
+
 if __name__ == "__main__":
-    get_jobscollider_jobs()
\ No newline at end of file
+    main()
@@ -0,0 +1,188 @@
+"""Métricas de rendimiento de los scrapers y de las rutas en formato de texto de Prometheus.
+
+Histogramas y contadores en memoria del proceso, sin dependencias: con
+varios workers de gunicorn cada uno tiene los suyos y /metrics responde con
+los del worker que atiende la petición.
+
+METRICS_ENABLED=0 las desactiva: los decoradores devuelven la función
+original, los iteradores no se envuelven y observe() vuelve sin hacer nada,
+así que en el camino caliente solo queda alguna comprobación de un booleano.
+"""
+import functools
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+
+# METRICS_ENABLED=0 desactiva la instrumentación y la ruta /metrics
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") != "0"
+
+# Límites superiores (inclusivos) de los buckets de cada tipo de histograma
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+CPU_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+BYTES_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864)
+COUNT_BUCKETS = (0, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+_metrics = []
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names, values, extra=""):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Histogram:
+    """Histograma acumulativo por combinación de valores de etiquetas"""
+
+    def __init__(self, name, help_text, labelnames, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+        _metrics.append(self)
+
+    def observe(self, value, *labels):
+        if not METRICS_ENABLED:
+            return
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # [contadores por bucket (+Inf al final), suma, total]
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {labels: (list(counts), total, count) for labels, (counts, total, count) in self._series.items()}
+        for labels, (counts, total, count) in sorted(series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += bucket_count
+                le = 'le="+Inf"' if bound == "+Inf" else f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {count}")
+        return lines
+
+class Counter:
+    """Contador monótono por combinación de valores de etiquetas"""
+
+    def __init__(self, name, help_text, labelnames):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self._values = {}
+        self._lock = threading.Lock()
+        _metrics.append(self)
+
+    def inc(self, *labels, amount=1):
+        if not METRICS_ENABLED:
+            return
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = dict(self._values)
+        for labels, value in sorted(values.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}")
+        return lines
+
+FETCH_SECONDS = Histogram("jobs_fetch_seconds", "Latencia de la descarga de un feed hasta recibir las cabeceras (status: código HTTP o excepción)",
+                          ("host", "status"), LATENCY_BUCKETS)
+FETCH_BYTES = Histogram("jobs_fetch_bytes", "Bytes descargados por feed", ("host",), BYTES_BUCKETS)
+PARSE_SECONDS = Histogram("jobs_parse_seconds", "Tiempo de parseo del XML o JSON de un feed, sin red ni extracción",
+                          ("source",), CPU_BUCKETS)
+HTML_CLEAN_SECONDS = Histogram("jobs_html_clean_seconds", "Tiempo de limpieza de una descripción HTML (con caché)",
+                               (), CPU_BUCKETS)
+HTML_CLEAN_BATCH_SECONDS = Histogram("jobs_html_clean_batch_seconds",
+                                     "Tiempo de limpieza de un lote de descripciones HTML sin caché",
+                                     ("mode",), LATENCY_BUCKETS)
+SCRAPE_SECONDS = Histogram("jobs_scrape_seconds", "Duración completa de get_*_jobs() por fuente",
+                           ("source",), LATENCY_BUCKETS)
+SCRAPE_JOBS = Histogram("jobs_scrape_jobs", "Trabajos devueltos por cada scraping", ("source",), COUNT_BUCKETS)
+SCRAPE_ERRORS = Counter("jobs_scrape_errors_total", "Errores de scraping por fuente y tipo de excepción",
+                        ("source", "type"))
+SERIALIZE_SECONDS = Histogram("jobs_serialize_seconds", "Tiempo de serialización de las respuestas",
+                              ("source", "format"), CPU_BUCKETS)
+REQUEST_SECONDS = Histogram("jobs_http_request_seconds", "Latencia de las rutas HTTP hasta tener la respuesta",
+                            ("route", "method", "status"), LATENCY_BUCKETS)
+
+def timer(histogram, *labels):
+    """Context manager que observa en histogram el tiempo de su bloque"""
+    if not METRICS_ENABLED:
+        return nullcontext()
+    return _timer(histogram, labels)
+
+@contextmanager
+def _timer(histogram, labels):
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.observe(time.perf_counter() - started_at, *labels)
+
+def timed(histogram, *labels):
+    """Decorador que observa en histogram la duración de cada llamada"""
+    def decorator(func):
+        if not METRICS_ENABLED:
+            return func
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started_at = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - started_at, *labels)
+        return wrapper
+    return decorator
+
+def scraper(source):
+    """Decorador de get_*_jobs(): duración total y número de trabajos devueltos (None = fallo)"""
+    def decorator(func):
+        if not METRICS_ENABLED:
+            return func
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started_at = time.perf_counter()
+            jobs = func(*args, **kwargs)
+            SCRAPE_SECONDS.observe(time.perf_counter() - started_at, source)
+            if jobs is not None:
+                SCRAPE_JOBS.observe(len(jobs), source)
+            return jobs
+        return wrapper
+    return decorator
+
+def count_errors(source, iterator):
+    """Devuelve iterator contando en SCRAPE_ERRORS la excepción con la que termine, si la hay"""
+    if not METRICS_ENABLED:
+        return iterator
+    return _count_errors(source, iterator)
+
+def _count_errors(source, iterator):
+    try:
+        yield from iterator
+    except Exception as e:
+        SCRAPE_ERRORS.inc(source, type(e).__name__)
+        raise
+
+def render():
+    """Todas las métricas en el formato de texto de Prometheus (versión 0.0.4)"""
+    lines = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
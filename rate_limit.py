@@ -0,0 +1,49 @@
+import os
+import threading
+import time
+from urllib.parse import urlparse
+
+# Peticiones por segundo y ráfaga máxima permitidas contra un mismo host
+RATE_LIMIT_PER_HOST = float(os.getenv("RATE_LIMIT_PER_HOST", "4"))
+RATE_LIMIT_BURST = float(os.getenv("RATE_LIMIT_BURST", "8"))
+
+class TokenBucket:
+    """Token bucket sencillo y seguro entre hilos"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Bloquea hasta que haya un token disponible y lo consume"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+def get_bucket(host):
+    """Devuelve (creándolo si hace falta) el bucket asociado a un host"""
+    with _buckets_lock:
+        bucket = _buckets.get(host)
+        if bucket is None:
+            bucket = TokenBucket(RATE_LIMIT_PER_HOST, RATE_LIMIT_BURST)
+            _buckets[host] = bucket
+        return bucket
+
+def wait_for_host(url):
+    """Espera el turno para lanzar una petición a la URL respetando el límite de su host"""
+    if RATE_LIMIT_PER_HOST <= 0:
+        return
+    get_bucket(urlparse(url).hostname).acquire()
@@ -1,14 +1,11 @@
 import requests
 import json
 import sys
-import html
-import unicodedata
 from datetime import datetime
-from bs4 import BeautifulSoup
-
-# Configurar la salida para usar UTF-8 en Windows
-if sys.platform == "win32":
-    sys.stdout.reconfigure(encoding='utf-8')
+import text_cleaning
+from text_cleaning import clean_text, clean_html_description, clean_html_descriptions
+from fetcher import fetch_feed, save_parsed_jobs
+import metrics
 
 def parse_date(date_str):
     """Convierte una fecha como '2025-03-11T21:00:08+00:00' a 'YYYY-MM-DD'"""
@@ -18,73 +15,90 @@ def parse_date(date_str):
     except (ValueError, TypeError):
         return ""
 
-def clean_text(text):
-    """Limpia texto: decodifica HTML, normaliza Unicode y preserva saltos de línea"""
-    if not text:
-        return ""
-    text = html.unescape(text)
-    text = unicodedata.normalize('NFC', text)
-    return text.strip()
+URL = "https://remoteok.com/api"
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+}
 
-def clean_html_description(html_text):
-    """Convierte HTML a texto plano preservando saltos de línea"""
-    if not html_text:
-        return ""
-    # Parsear HTML y separar elementos con \n
-    soup = BeautifulSoup(html_text, 'html.parser')
-    return clean_text(soup.get_text(separator='\n'))
+def iter_remoteok_jobs():
+    """Genera los trabajos de la API uno a uno, limpiando cada uno al emitirlo.
 
-def get_remoteok_jobs():
-    url = "https://remoteok.com/api"
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-    }
+    Lanza requests.exceptions.RequestException si falla la descarga y
+    ValueError si la respuesta no es JSON o no tiene el formato esperado
+    (y las cuenta en metrics.SCRAPE_ERRORS).
+    """
+    return metrics.count_errors("remoteok", _iter_remoteok_jobs())
+
+def _iter_remoteok_jobs():
+    print(f"Intentando API: {URL}", file=sys.stderr)
+    content, cached_jobs = fetch_feed(URL, headers=HEADERS, timeout=10)
+    
+    # API sin cambios: se reutilizan los trabajos ya procesados
+    if cached_jobs is not None:
+        yield from cached_jobs
+        return
+    
+    with metrics.timer(metrics.PARSE_SECONDS, "remoteok"):
+        data = json.loads(content)
+    
+    # La API devuelve una lista, el primer elemento es metadata
+    if isinstance(data, list) and len(data) > 1:
+        jobs_raw = data[1:]  # Excluir el primer elemento (legal info)
+    else:
+        raise ValueError("Formato inesperado de la API.")
     
+    # Con CLEAN_PROCESSES las descripciones se limpian por lotes (en paralelo
+    # si son bastantes) antes de emitir el primer trabajo
+    descriptions = None
+    if text_cleaning.CLEAN_PROCESSES > 0:
+        descriptions = clean_html_descriptions([job_raw.get("description", "") for job_raw in jobs_raw])
+    
+    jobs = []
+    for index, job_raw in enumerate(jobs_raw):
+        job = {
+            "title": clean_text(job_raw.get("position", "")),
+            "date": parse_date(job_raw.get("date", "")),
+            "company": clean_text(job_raw.get("company", "Empresa no especificada")),
+            "location": clean_text(job_raw.get("location", "Ubicación no especificada")),
+            "tags": [clean_text(tag) for tag in job_raw.get("tags", [])] if job_raw.get("tags") else [],
+            "type": "Full-Time",  # Asumimos por defecto, ajustable si hay más datos
+            "description": descriptions[index] if descriptions is not None else clean_html_description(job_raw.get("description", "")),
+            "link": clean_text(job_raw.get("url", "")),
+            "source": "remoteok",
+            "id_source": clean_text(job_raw.get("id", "")),
+            "salary_min": job_raw.get("salary_min", None),
+            "salary_max": job_raw.get("salary_max", None)
+        }
+        jobs.append(job)
+        yield job
+    
+    save_parsed_jobs(URL, jobs)
+
+@metrics.scraper("remoteok")
+def get_remoteok_jobs():
     try:
-        print(f"Intentando API: {url}", file=sys.stderr)
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
+        jobs = list(iter_remoteok_jobs())
     except requests.exceptions.HTTPError as e:
         print(f"Error HTTP: {e}", file=sys.stderr)
         return None
     except requests.exceptions.RequestException as e:
         print(f"Error de conexión: {e}", file=sys.stderr)
         return None
-    
-    if response.status_code == 200:
-        data = response.json()
-        
-        # La API devuelve una lista, el primer elemento es metadata
-        if isinstance(data, list) and len(data) > 1:
-            jobs_raw = data[1:]  # Excluir el primer elemento (legal info)
-        else:
-            print("Formato inesperado de la API.", file=sys.stderr)
-            return None
-        
-        jobs = []
-        for job_raw in jobs_raw:
-            job = {
-                "title": clean_text(job_raw.get("position", "")),
-                "date": parse_date(job_raw.get("date", "")),
-                "company": clean_text(job_raw.get("company", "Empresa no especificada")),
-                "location": clean_text(job_raw.get("location", "Ubicación no especificada")),
-                "tags": [clean_text(tag) for tag in job_raw.get("tags", [])] if job_raw.get("tags") else [],
-                "type": "Full-Time",  # Asumimos por defecto, ajustable si hay más datos
-                "description": clean_html_description(job_raw.get("description", "")),
-                "link": clean_text(job_raw.get("url", "")),
-                "source": "remoteok",
-                "id_source": clean_text(job_raw.get("id", "")),
-                "salary_min": job_raw.get("salary_min", None),
-                "salary_max": job_raw.get("salary_max", None)
-            }
-            jobs.append(job)
-        
-        # Imprimir el JSON por salida estándar
-        print(json.dumps(jobs, indent=4, ensure_ascii=False))
-        return jobs
-    else:
-        print(f"Error inesperado: {response.status_code}", file=sys.stderr)
+    except ValueError as e:
+        print(f"Error al parsear JSON: {e}", file=sys.stderr)
         return None
+    
+    return jobs
+
+def main():
+    """Uso desde la línea de comandos: imprime los trabajos en JSON por salida estándar"""
+    # Configurar la salida para usar UTF-8 en Windows
+    if sys.platform == "win32":
+        sys.stdout.reconfigure(encoding='utf-8')
+    jobs = get_remoteok_jobs()
+    if jobs is None:
+        sys.exit(1)
+    print(json.dumps(jobs, indent=4, ensure_ascii=False))
 
 if __name__ == "__main__":
-    get_remoteok_jobs()
\ No newline at end of file
+    main()
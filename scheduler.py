@@ -0,0 +1,95 @@
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import fcntl
+except ImportError:  # Windows: un solo proceso, siempre es líder
+    fcntl = None
+
+from job_store import JOB_STORE_PATH
+
+# Refresco periódico de las fuentes en segundo plano (SCHEDULER_ENABLED=0 lo desactiva)
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "1") != "0"
+# Intervalo por defecto (segundos) entre refrescos; SCHEDULER_INTERVAL_<CLAVE> lo sobrescribe
+SCHEDULER_INTERVAL = float(os.getenv("SCHEDULER_INTERVAL", "300"))
+# Fichero cuyo bloqueo decide qué worker de gunicorn es el líder
+SCHEDULER_LOCK_PATH = os.getenv("SCHEDULER_LOCK_PATH", f"{JOB_STORE_PATH}.scheduler.lock")
+# Cada cuánto intenta un worker seguidor hacerse con el liderazgo
+SCHEDULER_ELECTION_INTERVAL = float(os.getenv("SCHEDULER_ELECTION_INTERVAL", "10"))
+
+_state = {"started": False, "leader": False, "last_runs": {}}
+_lock = threading.Lock()
+
+def get_interval(key):
+    """Intervalo de refresco de una fuente: SCHEDULER_INTERVAL_<CLAVE> si existe, si no SCHEDULER_INTERVAL"""
+    return float(os.getenv(f"SCHEDULER_INTERVAL_{key.upper()}", SCHEDULER_INTERVAL))
+
+def _acquire_leadership():
+    """Bloquea hasta que este proceso tiene el bloqueo exclusivo del fichero de liderazgo.
+
+    El sistema libera el bloqueo si el proceso muere, así que otro worker
+    toma el relevo en el siguiente intento. Devuelve el fichero abierto,
+    que debe seguir abierto mientras se sea líder.
+    """
+    lock_file = open(SCHEDULER_LOCK_PATH, 'a')
+    if fcntl is None:
+        return lock_file
+    while True:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return lock_file
+        except OSError:
+            time.sleep(SCHEDULER_ELECTION_INTERVAL)
+
+def _refresh(key, fetcher, publish):
+    started_at = time.monotonic()
+    try:
+        jobs = publish(key, fetcher)
+        status = {"status": "ok" if jobs else "empty", "count": len(jobs or [])}
+    except Exception as e:
+        print(f"Error en el refresco programado de {key}: {e}", file=sys.stderr)
+        status = {"status": "error", "error": str(e)}
+    status["elapsed"] = round(time.monotonic() - started_at, 3)
+    status["finished_at"] = time.time()
+    with _lock:
+        _state["last_runs"][key] = status
+
+def _run(sources, publish):
+    # El fichero queda abierto (y bloqueado) mientras viva el proceso
+    lock_file = _acquire_leadership()
+    with _lock:
+        _state["leader"] = True
+    print(f"Proceso {os.getpid()} elegido líder del planificador", file=sys.stderr)
+    next_runs = {key: 0.0 for key in sources}
+    running = {}
+    with ThreadPoolExecutor(max_workers=len(sources)) as executor:
+        while True:
+            now = time.monotonic()
+            for key, fetcher in sources.items():
+                if next_runs[key] > now or (key in running and not running[key].done()):
+                    continue
+                next_runs[key] = now + get_interval(key)
+                running[key] = executor.submit(_refresh, key, fetcher, publish)
+            time.sleep(min(max(min(next_runs.values()) - time.monotonic(), 1), SCHEDULER_ELECTION_INTERVAL))
+
+def start(sources, publish):
+    """Arranca el planificador en un hilo de fondo (una vez por proceso).
+
+    Todos los workers compiten por el liderazgo, pero solo el líder llama
+    a publish(clave, scraper) para cada fuente cuando le toca; publish debe
+    hacer el scraping y dejar el resultado donde lo lean los demás workers.
+    """
+    with _lock:
+        if _state["started"]:
+            return
+        _state["started"] = True
+    threading.Thread(target=_run, args=(sources, publish), daemon=True, name="scheduler").start()
+
+def scheduler_status():
+    """Estado del planificador en este proceso para el health check"""
+    with _lock:
+        return {"enabled": SCHEDULER_ENABLED, "leader": _state["leader"], "pid": os.getpid(),
+                "last_runs": dict(_state["last_runs"])}
@@ -0,0 +1,138 @@
+import hashlib
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+
+from job_store import job_key
+
+# Peso de cada campo en la frecuencia de un término
+FIELD_WEIGHTS = (("title", 3), ("company", 2), ("tags", 2), ("category", 1), ("description", 1))
+# Parámetros de BM25
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_WORD_RE = re.compile(r"\w+")
+
+_lock = threading.RLock()
+# id del documento (fuente, clave) -> trabajo
+_docs = {}
+# id -> (hash del contenido indexado, términos con su frecuencia, longitud)
+_doc_terms = {}
+# término -> {id: frecuencia}
+_postings = defaultdict(dict)
+# fuente -> ids de sus trabajos vigentes
+_source_docs = {}
+_total_length = 0
+
+def tokenize(text):
+    """Términos de un texto: normalizado NFC (como clean_text), en minúsculas y separado por palabras"""
+    return _WORD_RE.findall(unicodedata.normalize('NFC', text or "").casefold())
+
+def _job_terms(job):
+    """Frecuencia ponderada de los términos de los campos indexados de un trabajo"""
+    terms = Counter()
+    for field, weight in FIELD_WEIGHTS:
+        value = job.get(field)
+        if isinstance(value, list):
+            value = " ".join(str(v) for v in value)
+        for term in tokenize(value):
+            terms[term] += weight
+    return terms
+
+def _content_hash(job):
+    parts = []
+    for field, _ in FIELD_WEIGHTS:
+        value = job.get(field)
+        parts.append(" ".join(str(v) for v in value) if isinstance(value, list) else str(value or ""))
+    return hashlib.blake2b("\x00".join(parts).encode('utf-8'), digest_size=16).digest()
+
+def _remove_doc(doc_id):
+    global _total_length
+    _, terms, length = _doc_terms.pop(doc_id)
+    for term in terms:
+        postings = _postings[term]
+        postings.pop(doc_id, None)
+        if not postings:
+            del _postings[term]
+    _total_length -= length
+    _docs.pop(doc_id, None)
+
+def _add_doc(doc_id, job, content_hash):
+    global _total_length
+    terms = _job_terms(job)
+    length = sum(terms.values())
+    for term, frequency in terms.items():
+        _postings[term][doc_id] = frequency
+    _doc_terms[doc_id] = (content_hash, terms, length)
+    _docs[doc_id] = job
+    _total_length += length
+
+def update_source(source, jobs):
+    """Sincroniza el índice con la última lista de trabajos de una fuente.
+
+    Solo se reindexan los trabajos nuevos o cuyo contenido ha cambiado y se
+    eliminan los que ya no aparecen. Devuelve (añadidos, eliminados).
+    """
+    added = 0
+    with _lock:
+        previous = _source_docs.get(source, set())
+        current = set()
+        for job in jobs:
+            doc_id = (source, job_key(job))
+            current.add(doc_id)
+            content_hash = _content_hash(job)
+            indexed = _doc_terms.get(doc_id)
+            if indexed is not None and indexed[0] == content_hash:
+                _docs[doc_id] = job
+                continue
+            if indexed is not None:
+                _remove_doc(doc_id)
+            _add_doc(doc_id, job, content_hash)
+            added += 1
+        expired = previous - current
+        for doc_id in expired:
+            _remove_doc(doc_id)
+        _source_docs[source] = current
+    return added, len(expired)
+
+def indexed_sources():
+    """Fuentes que ya tienen trabajos en el índice"""
+    with _lock:
+        return set(_source_docs)
+
+def search(query, sources=None):
+    """Busca trabajos que contengan los términos de query ordenados por relevancia (BM25).
+
+    Los trabajos que contienen todos los términos van siempre antes que los
+    que solo contienen algunos. Devuelve una lista de (puntuación, trabajo).
+    """
+    terms = list(dict.fromkeys(tokenize(query)))
+    if not terms:
+        return []
+    with _lock:
+        total_docs = len(_doc_terms)
+        if not total_docs:
+            return []
+        avg_length = _total_length / total_docs
+        scores = defaultdict(float)
+        matched = Counter()
+        for term in terms:
+            postings = _postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (total_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, frequency in postings.items():
+                if sources and doc_id[0] not in sources:
+                    continue
+                length = _doc_terms[doc_id][2]
+                scores[doc_id] += idf * frequency * (BM25_K1 + 1) / (frequency + BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length))
+                matched[doc_id] += 1
+        ranked = sorted(scores, key=lambda doc_id: (matched[doc_id], scores[doc_id]), reverse=True)
+        return [(round(scores[doc_id], 4), _docs[doc_id]) for doc_id in ranked]
+
+def index_stats():
+    """Tamaño del índice para el health check"""
+    with _lock:
+        return {"documents": len(_doc_terms), "terms": len(_postings)}
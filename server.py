@@ -1,68 +1,563 @@
-from flask import Flask, Response, jsonify
-from aijobs_feed_data import get_aijobs_jobs
-from remotive_feed_data import get_remotive_jobs
-from remoteok_data import get_remoteok_jobs
-from jobicy_feed_data import get_jobicy_jobs
-from weworkremotely_feed_data import get_weworkremotely_jobs
-from jobcollider_feed_data import get_jobscollider_jobs
+from flask import Flask, Response, g, jsonify, request
+from aijobs_feed_data import get_aijobs_jobs, iter_aijobs_jobs
+from remotive_feed_data import get_remotive_jobs, iter_remotive_jobs
+from remoteok_data import get_remoteok_jobs, iter_remoteok_jobs
+from jobicy_feed_data import get_jobicy_jobs, iter_jobicy_jobs
+from weworkremotely_feed_data import get_weworkremotely_jobs, iter_weworkremotely_jobs
+from jobcollider_feed_data import get_jobscollider_jobs, iter_jobscollider_jobs
+
+import cache
+from cache import get_or_load
+from text_cleaning import clean_cache_stats
+import job_store
+from dedup import dedup_jobs
+from job_query import apply_query, iter_query
+import search_index
+import facets
+import scheduler
+import singleflight
+from circuit_breaker import breaker_status
+from job_record import compact_jobs
+import metrics
 
 import os
+import sys
 import json
+import sqlite3
+import threading
+import time
+import gzip
+import hashlib
+from functools import partial
+from itertools import chain
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 
 app = Flask(__name__)
 
+# Fuentes disponibles: clave de caché -> función de scraping
+SOURCES = {
+    "aijobs": get_aijobs_jobs,
+    "remotive": get_remotive_jobs,
+    "remoteok": get_remoteok_jobs,
+    "jobicy": get_jobicy_jobs,
+    "weworkremotely": get_weworkremotely_jobs,
+    "jobscollider": get_jobscollider_jobs,
+}
+
+# Generadores de cada fuente para las respuestas en streaming
+SOURCE_STREAMS = {
+    "aijobs": iter_aijobs_jobs,
+    "remotive": iter_remotive_jobs,
+    "remoteok": iter_remoteok_jobs,
+    "jobicy": iter_jobicy_jobs,
+    "weworkremotely": iter_weworkremotely_jobs,
+    "jobscollider": iter_jobscollider_jobs,
+}
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+# Plazo por defecto (segundos) de cada fuente en /jobs/all; ALL_DEADLINE_<CLAVE> lo sobrescribe
+ALL_DEADLINE = float(os.getenv("ALL_DEADLINE", "20"))
+
+# Pool compartido: una fuente que no llega a tiempo sigue en segundo plano y llena la caché
+_executor = ThreadPoolExecutor(max_workers=len(SOURCES) * 2)
+# clave -> future de la carga de esa fuente que está en curso en _executor
+_loads = {}
+_loads_lock = threading.Lock()
+
+if metrics.METRICS_ENABLED:
+    @app.before_request
+    def _start_timer():
+        g.started_at = time.perf_counter()
+
+    @app.after_request
+    def _observe_request(response):
+        """Latencia por ruta hasta tener la respuesta (en streaming, hasta el primer trabajo)"""
+        started_at = g.pop("started_at", None)
+        if started_at is not None:
+            route = request.url_rule.rule if request.url_rule is not None else "desconocida"
+            metrics.REQUEST_SECONDS.observe(time.perf_counter() - started_at, route, request.method,
+                                            str(response.status_code))
+        return response
+
+def _scrape(key, fetcher):
+    """Ejecuta el scraper de una fuente y publica el resultado en el almacén compartido"""
+    jobs = fetcher()
+    if jobs:
+        job_store.safe_publish(key, jobs)
+    return jobs
+
+def _read_snapshot(key):
+    """Última instantánea de una fuente: (trabajos, fetched_at) o (None, None) si no hay o falla SQLite"""
+    try:
+        return job_store.load_snapshot(key)
+    except sqlite3.Error as e:
+        print(f"Error leyendo la instantánea de {key}: {e}", file=sys.stderr)
+        return None, None
+
+def _scrape_once(key, fetcher):
+    """Scraping coordinado: un solo hilo por worker y un solo worker a la vez por fuente.
+
+    Quien espera el bloqueo de otro worker vuelve a mirar la instantánea al
+    conseguirlo y, si se ha publicado mientras esperaba, la usa sin scraping.
+    """
+    def run():
+        requested_at = time.time()
+        with singleflight.process_lock(key):
+            jobs, fetched_at = _read_snapshot(key)
+            if jobs and fetched_at >= requested_at:
+                return jobs
+            return _scrape(key, fetcher)
+    return singleflight.do(key, run)
+
+def _snapshot_fallback(key):
+    """Última instantánea de una fuente que ha fallado (o tiene el circuito abierto); None si no hay"""
+    jobs, fetched_at = _read_snapshot(key)
+    if jobs:
+        print(f"Fuente {key} sin datos, se sirve la instantánea de hace {time.time() - fetched_at:.0f}s", file=sys.stderr)
+    return jobs
+
+def _load(key, fetcher):
+    """Carga los trabajos de una fuente para la caché local del worker.
+
+    Con el planificador activo se lee la última instantánea publicada por el
+    líder y solo se hace scraping si todavía no existe ninguna. Si el
+    scraping no devuelve nada se recurre a la última instantánea. Lo que
+    queda en memoria se compacta con job_record.compact_jobs.
+    """
+    jobs = None
+    if scheduler.SCHEDULER_ENABLED:
+        jobs, _ = _read_snapshot(key)
+    if not jobs:
+        jobs = _scrape_once(key, fetcher)
+    if not jobs:
+        jobs = _snapshot_fallback(key)
+    if jobs:
+        jobs = compact_jobs(jobs)
+        search_index.update_source(key, jobs)
+        facets.update_source(key, jobs)
+    return jobs
+
+def _get_jobs(key, fetcher):
+    """Trabajos de una fuente a través de la caché: devuelve (trabajos, estado de caché)"""
+    return get_or_load(key, partial(_load, key, fetcher))
+
+def _bad_request(message):
+    return Response(json.dumps({"error": message}), status=400, mimetype='application/json')
+
+def _parse_since():
+    """Lee ?since= de la petición; devuelve (timestamp o None, respuesta de error o None)"""
+    since = request.args.get("since")
+    if not since:
+        return None, None
+    try:
+        return job_store.parse_since(since), None
+    except ValueError:
+        return None, _bad_request("Parámetro since inválido: usa segundos epoch o una fecha ISO 8601")
+
+def _wants_stream():
+    """?stream=1 o Accept: application/x-ndjson piden la respuesta en streaming"""
+    return request.args.get("stream") == "1" or NDJSON_MIMETYPE in request.headers.get("Accept", "")
+
+def _has_snapshot(key):
+    try:
+        return key in job_store.snapshot_times()
+    except sqlite3.Error:
+        return False
+
+def _live_jobs(key, iterator, call):
+    """Trabajos según los genera el scraper; al terminar se publican como si los hubiera cargado la caché.
+
+    call es la reserva de singleflight.claim(): mientras dura el streaming
+    los demás hilos y workers esperan a este scraping en vez de repetirlo.
+    Si el generador devuelve una lista al terminar (jobscollider, con las
+    categorías unidas) se publica esa en lugar de los trabajos emitidos.
+    Un error a mitad del streaming ya no puede cambiar el código de estado:
+    se registra y la respuesta termina con los trabajos emitidos hasta ahí,
+    sin publicar nada.
+    """
+    jobs = []
+    published = None
+    try:
+        stream = iterator()
+        while True:
+            try:
+                job = next(stream)
+            except StopIteration as stop:
+                published = stop.value if stop.value is not None else jobs
+                break
+            except Exception as e:
+                print(f"Error en el streaming de {key}: {e}", file=sys.stderr)
+                return
+            jobs.append(job)
+            yield job
+        if published:
+            job_store.safe_publish(key, published)
+    finally:
+        # También si el cliente se desconecta: los que esperan hacen el scraping ellos mismos
+        if published:
+            singleflight.release(call, published)
+        else:
+            singleflight.abandon(call)
+    if published:
+        published = compact_jobs(published)
+        search_index.update_source(key, published)
+        facets.update_source(key, published)
+        cache.put(key, published)
+
+def _ndjson_lines(jobs):
+    for job in jobs:
+        yield json.dumps(job, ensure_ascii=False) + "\n"
+
+def _stream_response(key, fetcher, error_message):
+    """Respuesta NDJSON (un trabajo por línea) que empieza a enviarse con el primer trabajo.
+
+    Si la fuente ya está en la caché del worker (o en la instantánea del
+    planificador) se emite desde ahí; si no, cada trabajo sale según el
+    scraper lo parsea y limpia, sin esperar al feed completo. Si otra
+    petición ya está haciendo el scraping de la fuente, se espera a su
+    resultado como en la respuesta normal; si el scraper falla antes del
+    primer trabajo se sirve la última instantánea.
+    """
+    since, error_response = _parse_since()
+    if error_response is not None:
+        return error_response
+    # Los parámetros se validan antes de lanzar ningún scraping
+    try:
+        iter_query((), request.args)
+    except ValueError as e:
+        return _bad_request(f"Parámetros de paginación inválidos: {e}")
+    
+    call = None
+    if since is None and cache.peek(key) is None and not (scheduler.SCHEDULER_ENABLED and _has_snapshot(key)):
+        # Si ya hay un scraping de la fuente en curso (en este worker o en otro) se espera a él
+        call = singleflight.claim(key)
+    if call is not None:
+        cache_status = "STREAM"
+        live = _live_jobs(key, SOURCE_STREAMS[key], call)
+        # El primer trabajo se espera aquí para poder recurrir a la instantánea si el scraper falla
+        first = next(live, None)
+        if first is not None:
+            jobs = chain([first], live)
+        else:
+            cache_status = "MISS"
+            jobs = _snapshot_fallback(key)
+    else:
+        jobs, cache_status = _get_jobs(key, fetcher)
+    if not jobs:
+        return Response(json.dumps({"error": error_message}), status=500, mimetype='application/json')
+    if since is not None:
+        jobs = job_store.get_jobs_since(since, key)
+    
+    response = Response(_ndjson_lines(iter_query(jobs, request.args)), mimetype=NDJSON_MIMETYPE)
+    response.headers["X-Cache"] = cache_status
+    return response
+
+# clave -> (lista de trabajos, JSON, JSON comprimido, ETag) de la última versión serializada
+_encoded = {}
+_encoded_lock = threading.Lock()
+
+def _encode(key, jobs):
+    """Serializa y comprime la lista de una fuente una sola vez por cada versión que da la caché"""
+    with _encoded_lock:
+        entry = _encoded.get(key)
+    if entry is not None and entry[0] is jobs:
+        return entry
+    with metrics.timer(metrics.SERIALIZE_SECONDS, key, "json"):
+        body = jsonify(jobs).get_data()
+    with metrics.timer(metrics.SERIALIZE_SECONDS, key, "gzip"):
+        gzipped = gzip.compress(body, compresslevel=6, mtime=0)
+    entry = (jobs, body, gzipped, hashlib.blake2b(body, digest_size=16).hexdigest())
+    with _encoded_lock:
+        _encoded[key] = entry
+    return entry
+
+def _encoded_response(key, jobs):
+    """Respuesta completa (sin filtros) a partir de los bytes ya serializados, con ETag y gzip"""
+    _, body, gzipped, etag = _encode(key, jobs)
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    elif request.accept_encodings["gzip"]:
+        response = Response(gzipped, mimetype='application/json')
+        response.headers["Content-Encoding"] = "gzip"
+    else:
+        response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.headers["Vary"] = "Accept-Encoding"
+    return response
+
+def _jobs_response(key, fetcher, error_message):
+    """Sirve los trabajos de una fuente a través de la caché y añade la cabecera X-Cache.
+
+    Con ?since= solo devuelve los trabajos nuevos o modificados desde esa
+    fecha; X-Store-Time indica el valor a usar en la siguiente sincronización.
+    Los filtros, la paginación y ?fields= (ver job_query) se aplican antes de
+    serializar; X-Total-Count es el total que cumple los filtros. Con
+    ?stream=1 o Accept: application/x-ndjson se responde en streaming.
+    Sin parámetros se reutiliza el JSON (y su versión gzip) ya serializado
+    de esa versión de la lista, con ETag para responder 304.
+    """
+    if _wants_stream():
+        return _stream_response(key, fetcher, error_message)
+    since, error_response = _parse_since()
+    if error_response is not None:
+        return error_response
+    store_time = time.time()
+    jobs, cache_status = _get_jobs(key, fetcher)
+    if jobs and not request.args:
+        response = _encoded_response(key, jobs)
+        response.headers["X-Cache"] = cache_status
+        response.headers["X-Store-Time"] = f"{store_time:.3f}"
+        response.headers["X-Total-Count"] = str(len(jobs))
+        return response
+    if jobs:
+        if since is not None:
+            jobs = job_store.get_jobs_since(since, key)
+        try:
+            jobs, total = apply_query(jobs, request.args)
+        except ValueError as e:
+            return _bad_request(f"Parámetros de paginación inválidos: {e}")
+        with metrics.timer(metrics.SERIALIZE_SECONDS, key, "json"):
+            response = jsonify(jobs)
+        response.headers["X-Cache"] = cache_status
+        response.headers["X-Store-Time"] = f"{store_time:.3f}"
+        response.headers["X-Total-Count"] = str(total)
+        return response
+    return Response(json.dumps({"error": error_message}), status=500, mimetype='application/json')
+
 @app.route('/jobs/aijobs', methods=['GET'])
 def fetch_aijobs():
-    jobs = get_aijobs_jobs()
-    if jobs:
-        return jsonify(jobs)
-    return Response(json.dumps({"error": "No se pudieron obtener los trabajos ai platform"}), status=500, mimetype='application/json')
+    return _jobs_response("aijobs", get_aijobs_jobs, "No se pudieron obtener los trabajos ai platform")
 
 
 @app.route('/jobs/remotivejobs', methods=['GET'])
 def fetch_remotivejobs():  # Renombrado
-    jobs = get_remotive_jobs()
-    if jobs:
-        return jsonify(jobs)
-    return Response(json.dumps({"error": "No se pudieron obtener los trabajos remotive jobs"}), status=500, mimetype='application/json')
+    return _jobs_response("remotive", get_remotive_jobs, "No se pudieron obtener los trabajos remotive jobs")
 
 
 
 @app.route('/jobs/remoteokjobs', methods=['GET'])
 def fetch_remoteokjobs():  # Renombrado
-    jobs = get_remoteok_jobs()
-    if jobs:
-        return jsonify(jobs)
-    return Response(json.dumps({"error": "No se pudieron obtener los trabajos remotive jobs"}), status=500, mimetype='application/json')
+    return _jobs_response("remoteok", get_remoteok_jobs, "No se pudieron obtener los trabajos remotive jobs")
 
 @app.route('/jobs/jobicyjobs', methods=['GET'])
 def fetch_jobicyjobs():  # Renombrado
-    jobs = get_jobicy_jobs()
-    if jobs:
-        return jsonify(jobs)
-    return Response(json.dumps({"error": "No se pudieron obtener los trabajos remotive jobs"}), status=500, mimetype='application/json')
+    return _jobs_response("jobicy", get_jobicy_jobs, "No se pudieron obtener los trabajos remotive jobs")
 
 
 @app.route('/jobs/weworkremotelyjobs', methods=['GET'])
 def fetch_weworkremotelyjobs():  # Renombrado
-    jobs = get_weworkremotely_jobs()
-    if jobs:
-        return jsonify(jobs)
-    return Response(json.dumps({"error": "No se pudieron obtener los trabajos weworkremotely jobs"}), status=500, mimetype='application/json')
+    return _jobs_response("weworkremotely", get_weworkremotely_jobs, "No se pudieron obtener los trabajos weworkremotely jobs")
 
 @app.route('/jobs/jobscolliderjobs', methods=['GET'])
 def fetch_jobscolliderjobs():  # Renombrado
-    jobs = get_jobscollider_jobs()
-    if jobs:
-        return jsonify(jobs)
-    return Response(json.dumps({"error": "No se pudieron obtener los trabajos jobscollider jobs"}), status=500, mimetype='application/json')
+    return _jobs_response("jobscollider", get_jobscollider_jobs, "No se pudieron obtener los trabajos jobscollider jobs")
+
+
+
+
+def _timed_load(key, fetcher):
+    """Carga una fuente a través de la caché y mide cuánto ha tardado"""
+    started_at = time.monotonic()
+    jobs, cache_status = _get_jobs(key, fetcher)
+    return jobs, cache_status, round(time.monotonic() - started_at, 3)
+
+# (listas de la caché de cada fuente, lista fusionada) del último /jobs/all con dedup
+_deduped = None
+_deduped_lock = threading.Lock()
 
+def _dedup_sources(source_lists):
+    """dedup_jobs de todas las fuentes una sola vez por cada combinación de versiones que da la caché"""
+    global _deduped
+    with _deduped_lock:
+        entry = _deduped
+    if entry is not None and len(entry[0]) == len(source_lists) and all(
+            cached is jobs for cached, jobs in zip(entry[0], source_lists)):
+        return entry[1]
+    all_jobs = dedup_jobs(list(chain.from_iterable(source_lists)))
+    with _deduped_lock:
+        _deduped = (source_lists, all_jobs)
+    return all_jobs
 
+def _forget_load(key, future):
+    with _loads_lock:
+        if _loads.get(key) is future:
+            del _loads[key]
+
+def _start_load(key, fetcher):
+    """Future con (trabajos, estado de caché, segundos) de una fuente para /jobs/all y la búsqueda.
+
+    Lo que ya está en la caché (HIT o STALE) se resuelve aquí mismo sin
+    ocupar el pool. Si la fuente ya se está cargando se devuelve el future
+    de esa carga en vez de encolar otra: con una fuente colgada las
+    peticiones siguientes esperan a la misma carga hasta su plazo y no
+    llenan el pool dejando sin hilos a las demás fuentes.
+    """
+    if cache.peek(key) is not None:
+        future = Future()
+        try:
+            future.set_result(_timed_load(key, fetcher))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+    with _loads_lock:
+        future = _loads.get(key)
+        started = future is None
+        if started:
+            future = _loads[key] = _executor.submit(_timed_load, key, fetcher)
+    if started:
+        # Fuera del bloqueo: si la carga ya ha terminado el callback se ejecuta aquí mismo
+        future.add_done_callback(partial(_forget_load, key))
+    return future
+
+@app.route('/jobs/all', methods=['GET'])
+def fetch_all_jobs():
+    since, error_response = _parse_since()
+    if error_response is not None:
+        return error_response
+    store_time = time.time()
+    started_at = time.monotonic()
+    futures = {key: _start_load(key, fetcher) for key, fetcher in SOURCES.items()}
+    
+    source_lists = []
+    sources = {}
+    for key, future in futures.items():
+        deadline = float(os.getenv(f"ALL_DEADLINE_{key.upper()}", ALL_DEADLINE))
+        try:
+            jobs, cache_status, elapsed = future.result(timeout=max(0, started_at + deadline - time.monotonic()))
+        except FutureTimeoutError:
+            sources[key] = {"status": "timeout", "count": 0, "deadline": deadline}
+            continue
+        except Exception as e:
+            sources[key] = {"status": "error", "count": 0, "error": str(e)}
+            continue
+        
+        if jobs:
+            if since is not None:
+                jobs = job_store.get_jobs_since(since, key)
+            source_lists.append(jobs)
+            sources[key] = {"status": "ok", "count": len(jobs), "cache": cache_status, "elapsed": elapsed}
+        else:
+            sources[key] = {"status": "error", "count": 0, "elapsed": elapsed}
+    
+    # Las ofertas publicadas en varios portales se fusionan salvo con ?dedup=0
+    if request.args.get("dedup", "1") == "0":
+        all_jobs = list(chain.from_iterable(source_lists))
+    elif since is not None:
+        all_jobs = dedup_jobs(list(chain.from_iterable(source_lists)))
+    else:
+        all_jobs = _dedup_sources(source_lists)
+    
+    try:
+        all_jobs, total = apply_query(all_jobs, request.args)
+    except ValueError as e:
+        return _bad_request(f"Parámetros de paginación inválidos: {e}")
+    
+    if any(status["status"] == "ok" for status in sources.values()):
+        with metrics.timer(metrics.SERIALIZE_SECONDS, "all", "json"):
+            response = jsonify({"jobs": all_jobs, "total": total, "sources": sources})
+        response.headers["X-Store-Time"] = f"{store_time:.3f}"
+        return response
+    return Response(json.dumps({"error": "No se pudieron obtener trabajos de ninguna fuente", "sources": sources}), status=500, mimetype='application/json')
+
+
+def _load_missing_sources(loaded, purpose):
+    """Carga, con los plazos de /jobs/all, las fuentes que no están en loaded (nunca cargadas en este worker)"""
+    started_at = time.monotonic()
+    pending = {key: _start_load(key, fetcher) for key, fetcher in SOURCES.items() if key not in loaded}
+    for key, future in pending.items():
+        deadline = float(os.getenv(f"ALL_DEADLINE_{key.upper()}", ALL_DEADLINE))
+        try:
+            future.result(timeout=max(0, started_at + deadline - time.monotonic()))
+        except Exception as e:
+            print(f"Fuente {key} no disponible para {purpose}: {e!r}", file=sys.stderr)
+
+# Número de resultados por defecto de /jobs/search
+SEARCH_DEFAULT_LIMIT = 20
+
+@app.route('/jobs/search', methods=['GET'])
+def search_jobs():
+    """Búsqueda por palabras clave en título, empresa, tags y descripción (?q=).
+
+    Usa el índice invertido que se actualiza con cada refresco de las fuentes;
+    solo se hace scraping para las fuentes que aún no se han cargado nunca.
+    Admite los mismos filtros, paginación y ?fields= que el resto de rutas.
+    """
+    query = request.args.get("q", "").strip()
+    if not query:
+        return _bad_request("Falta el parámetro q")
+    _load_missing_sources(search_index.indexed_sources(), "la búsqueda")
+    
+    results = [dict(job, score=score) for score, job in search_index.search(query)]
+    args = request.args.to_dict()
+    args.setdefault("limit", str(SEARCH_DEFAULT_LIMIT))
+    try:
+        results, total = apply_query(results, args)
+    except ValueError as e:
+        return _bad_request(f"Parámetros de paginación inválidos: {e}")
+    with metrics.timer(metrics.SERIALIZE_SECONDS, "search", "json"):
+        return jsonify({"query": query, "total": total, "jobs": results})
+
+
+@app.route('/jobs/facets', methods=['GET'])
+def facet_jobs():
+    """Recuentos por source, type, location, tags, category y fecha sin descargar los trabajos.
+
+    Se mantienen al cargar cada fuente (ver facets). Filtros: source, date,
+    date_from y date_to como en el resto de rutas; ?facets= elige las
+    facetas, ?limit= el número de valores por faceta y ?date_bucket=
+    agrupa las fechas por day (por defecto), week o month.
+    """
+    unsupported = [name for name in ("type", "location", "q") if request.args.get(name)]
+    if unsupported:
+        return _bad_request(f"Filtros no soportados en /jobs/facets: {', '.join(unsupported)}")
+    names = [name.strip() for name in request.args.get("facets", "").split(",") if name.strip()]
+    unknown = [name for name in names if name not in facets.FACETS]
+    if unknown:
+        return _bad_request(f"Facetas desconocidas: {', '.join(unknown)}; disponibles: {', '.join(facets.FACETS)}")
+    date_bucket = request.args.get("date_bucket", "day")
+    if date_bucket not in facets.DATE_BUCKETS:
+        return _bad_request(f"date_bucket debe ser uno de: {', '.join(facets.DATE_BUCKETS)}")
+    limit = request.args.get("limit")
+    try:
+        limit = int(limit) if limit else None
+        if limit is not None and limit < 0:
+            raise ValueError("limit no puede ser negativo")
+    except ValueError as e:
+        return _bad_request(f"Parámetros de paginación inválidos: {e}")
+    sources = [part.strip().casefold() for part in request.args.get("source", "").split(",") if part.strip()]
+
+    _load_missing_sources(facets.facet_sources(), "las facetas")
+    
+    result = facets.facet_counts(
+        sources=sources or None,
+        date=request.args.get("date", "").strip() or None,
+        date_from=request.args.get("date_from", "").strip() or None,
+        date_to=request.args.get("date_to", "").strip() or None,
+        facets=names or None,
+        limit=limit,
+        date_bucket=date_bucket,
+    )
+    with metrics.timer(metrics.SERIALIZE_SECONDS, "facets", "json"):
+        return jsonify(result)
 
 
 @app.route('/', methods=['GET'])
 def health_check():
-    return jsonify({"message": "Servicio de scraping de ofertas activo"})
+    return jsonify({"message": "Servicio de scraping de ofertas activo", "clean_cache": clean_cache_stats(),
+                    "search_index": search_index.index_stats(), "scheduler": scheduler.scheduler_status(),
+                    "facets": facets.facet_stats(), "singleflight": singleflight.singleflight_stats(), "circuit_breakers": breaker_status()})
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Métricas del worker en el formato de texto de Prometheus (404 con METRICS_ENABLED=0)"""
+    if not metrics.METRICS_ENABLED:
+        return Response(json.dumps({"error": "Métricas desactivadas"}), status=404, mimetype='application/json')
+    return Response(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+# Pre-carga periódica de todas las fuentes; solo el worker líder hace scraping
+if scheduler.SCHEDULER_ENABLED:
+    scheduler.start(SOURCES, _scrape_once)
 
 if __name__ == "__main__":
     port = int(os.getenv("PORT", "8080"))
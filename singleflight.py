@@ -0,0 +1,154 @@
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: solo coordinación entre hilos
+    fcntl = None
+
+from job_store import JOB_STORE_PATH
+
+# Máximo (segundos) que un worker espera al scraping de otro antes de hacerlo él mismo
+SINGLEFLIGHT_LOCK_TIMEOUT = float(os.getenv("SINGLEFLIGHT_LOCK_TIMEOUT", "60"))
+
+class _Call:
+    """Una ejecución en curso y su resultado, compartido con los que esperan"""
+
+    def __init__(self, key=None):
+        self.key = key
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        # Sin resultado: los que esperan vuelven a intentarlo ellos mismos
+        self.abandoned = False
+        # Fichero con el bloqueo entre procesos de una llamada reservada con claim()
+        self.lock_file = None
+
+_calls = {}
+_stats = {"executed": 0, "shared": 0}
+_lock = threading.Lock()
+
+def do(key, fn):
+    """Ejecuta fn() una sola vez por clave aunque la pidan varios hilos a la vez.
+
+    El primer hilo la ejecuta y los que llegan mientras tanto esperan y
+    reciben el mismo resultado (o la misma excepción). Si esperaban a una
+    llamada reservada con claim() que se abandona, lo vuelven a intentar.
+    """
+    while True:
+        with _lock:
+            call = _calls.get(key)
+            owner = call is None
+            if owner:
+                call = _calls[key] = _Call(key)
+                _stats["executed"] += 1
+            else:
+                _stats["shared"] += 1
+        if owner:
+            break
+        call.done.wait()
+        if call.abandoned:
+            continue
+        if call.error is not None:
+            raise call.error
+        return call.result
+    try:
+        call.result = fn()
+        return call.result
+    except Exception as e:
+        call.error = e
+        raise
+    finally:
+        _finish(call)
+
+def _open_lock_file(key):
+    return open(f"{JOB_STORE_PATH}.{key}.lock", 'a')
+
+def _try_lock(lock_file):
+    """Intenta el bloqueo exclusivo del fichero sin esperar"""
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except OSError:
+        return False
+
+@contextmanager
+def process_lock(key, timeout=None):
+    """Bloqueo exclusivo por clave entre procesos (workers de gunicorn) con un fichero junto al almacén.
+
+    Si no se consigue en timeout segundos se continúa sin él: es mejor
+    repetir un scraping que dejar la petición colgada.
+    """
+    timeout = SINGLEFLIGHT_LOCK_TIMEOUT if timeout is None else timeout
+    if fcntl is None:
+        yield
+        return
+    with _open_lock_file(key) as lock_file:
+        deadline = time.monotonic() + timeout
+        while not _try_lock(lock_file):
+            if time.monotonic() >= deadline:
+                print(f"Tiempo agotado esperando el bloqueo de {key}, se continúa sin él", file=sys.stderr)
+                break
+            time.sleep(0.05)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def claim(key):
+    """Reserva la ejecución de key sin esperar, para trabajos que no caben en do() (un streaming).
+
+    Devuelve la llamada reservada, con el bloqueo entre procesos tomado, o
+    None si ya la está ejecutando otro hilo de este worker u otro worker.
+    Mientras tanto, do(key, ...) espera a que se termine con release() o
+    abandon().
+    """
+    with _lock:
+        if key in _calls:
+            return None
+    lock_file = None
+    if fcntl is not None:
+        lock_file = _open_lock_file(key)
+        if not _try_lock(lock_file):
+            lock_file.close()
+            return None
+    with _lock:
+        # Otro hilo puede haber empezado entre la comprobación y el bloqueo
+        owner = key not in _calls
+        if owner:
+            call = _calls[key] = _Call(key)
+            call.lock_file = lock_file
+            _stats["executed"] += 1
+    if not owner:
+        if lock_file is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+            lock_file.close()
+        return None
+    return call
+
+def _finish(call):
+    if call.lock_file is not None:
+        fcntl.flock(call.lock_file, fcntl.LOCK_UN)
+        call.lock_file.close()
+        call.lock_file = None
+    with _lock:
+        del _calls[call.key]
+    call.done.set()
+
+def release(call, result):
+    """Termina una llamada reservada con claim() y entrega result a los que esperan"""
+    call.result = result
+    _finish(call)
+
+def abandon(call):
+    """Termina sin resultado una llamada reservada con claim(): los que esperan lo intentan ellos"""
+    call.abandoned = True
+    _finish(call)
+
+def singleflight_stats():
+    """Ejecuciones reales y peticiones que reutilizaron una ejecución en curso"""
+    with _lock:
+        return dict(_stats)
@@ -0,0 +1,317 @@
+import sys
+import xml.etree.ElementTree as ET
+from datetime import datetime
+
+import requests
+
+import text_cleaning
+from text_cleaning import clean_text, clean_html_description, clean_html_descriptions
+from fetcher import fetch_feed, save_parsed_jobs
+from feed_parser import iter_elements
+import metrics
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+}
+
+def clean_cdata_html(html_text):
+    """Como clean_html_description pero quitando antes los marcadores <![CDATA[ ]]> que deja remotive"""
+    if not html_text:
+        return ""
+    return clean_html_description(html_text.replace('<![CDATA[', '').replace(']]>', ''))
+
+def extract_id_from_guid(guid):
+    """Extrae el ID numérico del guid (ej. '451872' de 'https://jobscollider.com/jobs/...-451872')"""
+    if guid and guid.startswith("https://jobscollider.com/jobs/"):
+        return guid.split('-')[-1]
+    return ""
+
+def company_before_colon(title):
+    """Empresa de un título 'Empresa: Puesto' (None si no tiene ese formato)"""
+    return title.split(': ', 1)[0] if ': ' in title else None
+
+def company_after_at(title):
+    """Empresa de un título 'Puesto at Empresa' (None si no tiene ese formato)"""
+    return title.split(' at ', 1)[1] if ' at ' in title else None
+
+# Registro de fuentes XML. Cada campo del trabajo se describe como
+# (nombre, origen, transformación, valor por defecto):
+#   origen          'etiqueta' o 'prefijo:etiqueta' (primer hijo con ese nombre),
+#                   '@atributo' del elemento, '=campo' ya calculado del trabajo,
+#                   '$clave' del contexto de la llamada o None para una constante
+#   transformación  'text', 'html', 'date', 'list', una función o None (valor tal cual)
+#   por defecto     valor final si falta el origen o la transformación devuelve None
+# date_format es el formato de las fechas y date_fallback 'today' usa la fecha
+# actual cuando no se pueden interpretar ('' las deja vacías).
+REGISTRY = {
+    "aijobs": {
+        "url": "https://aijobs.net/feed",
+        "item_tag": "item",
+        "namespaces": {"job_listing": "https://aijobs.net"},
+        "date_format": "%a, %d %b %Y %H:%M:%S %z",
+        "date_fallback": "",
+        "fields": [
+            ("title", "title", "text", ""),
+            ("date", "pubDate", "date", ""),
+            ("company", "job_listing:company", "text", "Empresa no especificada"),
+            ("location", "job_listing:location", "text", "Ubicación no especificada"),
+            ("type", "job_listing:job_type", "text", "No especificado"),
+            ("description", "description", "text", ""),
+            ("link", "link", "text", ""),
+            ("source", None, None, "aijobs"),
+        ],
+    },
+    "remotive": {
+        "url": "https://remotive.com/remote-jobs/feed",
+        "item_tag": "item",
+        "date_format": "%a, %d %b %Y %H:%M:%S %Z",
+        "date_fallback": "",
+        "fields": [
+            ("title", "title", "text", ""),
+            ("date", "pubDate", "date", ""),
+            ("company", "company", "text", "Empresa no especificada"),
+            ("location", "location", "text", "Ubicación no especificada"),
+            ("category", "category", "list", []),
+            ("type", "type", "text", "No especificado"),
+            ("description", "description", clean_cdata_html, ""),
+            ("link", "link", "text", ""),
+            ("source", None, None, "remotive"),
+            ("id_source", "guid", lambda guid: (guid or "").split('-')[-1], ""),
+        ],
+    },
+    "jobicy": {
+        "url": "https://jobicy.com/feed/newjobs",
+        "item_tag": "job",
+        "date_format": "%d.%m.%Y",
+        "date_fallback": "today",
+        "fields": [
+            ("title", "name", "text", ""),
+            ("date", "pubdate", "date", ""),
+            ("company", "company", "text", "Empresa no especificada"),
+            ("location", "region", "text", "Not available"),
+            ("type", "jobtype", "text", "Not specified"),
+            ("description", "description", "html", ""),
+            ("link", "link", "text", ""),
+            ("source", None, None, "jobicy"),
+            ("id_source", "@id", None, ""),
+        ],
+    },
+    "weworkremotely": {
+        "url": "https://weworkremotely.com/remote-jobs.rss",
+        "item_tag": "item",
+        "date_format": "%a, %d %b %Y %H:%M:%S %z",
+        "date_fallback": "",
+        "fields": [
+            ("title", "title", "text", ""),
+            ("date", "pubDate", "date", ""),
+            ("company", "=title", company_before_colon, "Empresa no especificada"),
+            ("location", "region", "text", "Ubicación no especificada"),
+            ("category", "category", "list", []),
+            ("type", "type", "text", "No especificado"),
+            ("description", "description", "html", ""),
+            ("link", "link", "text", ""),
+            ("source", None, None, "weworkremotely"),
+        ],
+    },
+    # Una URL por categoría (ver jobcollider_feed_data.FEEDS); la categoría llega en el contexto
+    "jobscollider": {
+        "item_tag": "item",
+        "date_format": "%a, %d %b %Y %H:%M:%S %z",
+        "date_fallback": "today",
+        "fields": [
+            ("title", "title", "text", ""),
+            ("date", "pubDate", "date", ""),
+            ("company", "=title", company_after_at, "Empresa no especificada"),
+            ("location", None, None, "Not available"),
+            ("category", "$category", lambda category: [category], []),
+            ("description", "description", "html", ""),
+            ("link", "link", "text", ""),
+            ("source", None, None, "jobscollider"),
+            ("id_source", "guid", extract_id_from_guid, ""),
+        ],
+    },
+}
+
+def _date_parser(date_format, fallback):
+    def parse_date(value):
+        """Convierte la fecha del feed a 'YYYY-MM-DD'"""
+        try:
+            return datetime.strptime(value, date_format).strftime("%Y-%m-%d")
+        except (ValueError, TypeError):
+            return datetime.now().strftime("%Y-%m-%d") if fallback == "today" else ""
+    return parse_date
+
+def _expand_tag(tag, namespaces):
+    """'prefijo:etiqueta' -> '{uri}etiqueta', que es como ElementTree nombra a los hijos"""
+    if ":" in tag:
+        prefix, local = tag.split(":", 1)
+        return f"{{{namespaces[prefix]}}}{local}"
+    return tag
+
+def compile_extractor(config, raw_html=False):
+    """Convierte una entrada del registro en una función (elemento, contexto) -> trabajo.
+
+    Las etiquetas y transformaciones se resuelven aquí una sola vez; la
+    función resultante recorre los hijos de cada elemento en una sola pasada
+    quedándose con el texto del primero de cada etiqueta que interesa. Con
+    raw_html los campos 'html' se dejan sin limpiar para limpiarlos por lotes.
+    """
+    transforms = {
+        "text": clean_text,
+        "html": (lambda html_text: html_text) if raw_html else clean_html_description,
+        "date": _date_parser(config.get("date_format"), config.get("date_fallback", "")),
+        "list": lambda text: [clean_text(text)],
+    }
+    namespaces = config.get("namespaces", {})
+    fields = []
+    wanted = set()
+    for name, origin, transform, default in config["fields"]:
+        transform = transforms.get(transform, transform)
+        if origin is None:
+            fields.append((name, "const", None, None, default))
+        elif origin[0] in "@=$":
+            fields.append((name, origin[0], origin[1:], transform, default))
+        else:
+            tag = _expand_tag(origin, namespaces)
+            wanted.add(tag)
+            fields.append((name, "child", tag, transform, default))
+
+    def extract(item, context=None):
+        texts = {}
+        for child in item:
+            if child.tag in wanted and child.tag not in texts:
+                texts[child.tag] = child.text
+        job = {}
+        for name, kind, key, transform, default in fields:
+            if kind == "child":
+                present = key in texts
+                value = texts.get(key)
+            elif kind == "@":
+                value = item.get(key)
+                present = value is not None
+            elif kind == "=":
+                value = job.get(key)
+                present = True
+            elif kind == "$":
+                value = (context or {}).get(key)
+                present = value is not None
+            else:
+                job[name] = default
+                continue
+            if present and transform is not None:
+                value = transform(value)
+            if not present or value is None:
+                # Copia para que los trabajos no compartan la misma lista por defecto
+                value = list(default) if isinstance(default, list) else default
+            job[name] = value
+        return job
+
+    return extract
+
+_extractors = {name: compile_extractor(config) for name, config in REGISTRY.items()}
+_raw_html_extractors = {name: compile_extractor(config, raw_html=True) for name, config in REGISTRY.items()}
+# fuente -> campos con transformación 'html'
+_html_fields = {name: [field[0] for field in config["fields"] if field[2] == "html"] for name, config in REGISTRY.items()}
+
+def iter_feed_jobs(name, url=None, context=None):
+    """Genera los trabajos de una fuente del registro uno a uno, según se parsean y limpian.
+
+    url sustituye a la del registro (jobscollider tiene una por categoría) y
+    context se pasa al extractor. Lanza requests.exceptions.RequestException
+    si falla la descarga y ET.ParseError si el XML no es válido (y las cuenta
+    en metrics.SCRAPE_ERRORS).
+    """
+    return metrics.count_errors(name, _iter_feed_jobs(name, url, context))
+
+def _iter_feed_jobs(name, url, context):
+    config = REGISTRY[name]
+    url = url or config["url"]
+    extract = _extractors[name]
+    print(f"Intentando RSS: {url}", file=sys.stderr)
+    content, cached_jobs = fetch_feed(url, headers=HEADERS, timeout=10, stream=True)
+
+    # Feed sin cambios: se reutilizan los trabajos ya procesados sin parsear XML
+    if cached_jobs is not None:
+        yield from cached_jobs
+        return
+
+    items = iter_elements(content, config["item_tag"], source=name)
+    html_fields = _html_fields[name]
+    if text_cleaning.CLEAN_PROCESSES > 0 and html_fields:
+        # Limpieza por lotes: se extrae el feed entero con el HTML en bruto y
+        # las descripciones se limpian de una vez (en paralelo si son bastantes)
+        try:
+            jobs = _extract_raw_html(name, items, context)
+        except ET.ParseError as e:
+            # Como sin lotes: se emiten los trabajos leídos antes del error
+            clean_html_fields(name, e.jobs)
+            yield from e.jobs
+            raise
+        clean_html_fields(name, jobs)
+        yield from jobs
+    else:
+        jobs = []
+        # Cada elemento se procesa según llega y se libera después
+        for item in items:
+            job = extract(item, context)
+            jobs.append(job)
+            yield job
+
+    save_parsed_jobs(url, jobs)
+
+def _extract_raw_html(name, items, context):
+    """Trabajos de todos los elementos con el HTML en bruto.
+
+    Si el XML se corta, el ET.ParseError lleva en .jobs los trabajos leídos
+    hasta ese punto.
+    """
+    extract = _raw_html_extractors[name]
+    jobs = []
+    try:
+        for item in items:
+            jobs.append(extract(item, context))
+    except ET.ParseError as e:
+        e.jobs = jobs
+        raise
+    return jobs
+
+def read_raw_feed_jobs(name, url=None, context=None):
+    """Lista de trabajos de un feed con los campos HTML sin limpiar, para limpiarlos junto a los de otros feeds.
+
+    Devuelve (trabajos, sin_limpiar). Si el feed no ha cambiado los trabajos
+    salen ya limpios de la caché de feeds y sin_limpiar es False; si se acaba
+    de parsear es True y el llamador tiene que pasar la lista por
+    clean_html_fields() y guardarla con fetcher.save_parsed_jobs(). Lanza las
+    mismas excepciones que iter_feed_jobs (y las cuenta igual); si el XML se
+    corta, el ET.ParseError lleva en .jobs los trabajos leídos hasta ahí, sin
+    limpiar.
+    """
+    config = REGISTRY[name]
+    url = url or config["url"]
+    print(f"Intentando RSS: {url}", file=sys.stderr)
+    try:
+        content, cached_jobs = fetch_feed(url, headers=HEADERS, timeout=10, stream=True)
+        if cached_jobs is not None:
+            return list(cached_jobs), False
+        return _extract_raw_html(name, iter_elements(content, config["item_tag"], source=name), context), True
+    except Exception as e:
+        metrics.SCRAPE_ERRORS.inc(name, type(e).__name__)
+        raise
+
+def clean_html_fields(name, jobs):
+    """Limpia por lotes (en paralelo si son bastantes) los campos HTML de trabajos extraídos en bruto"""
+    for field in _html_fields[name]:
+        for job, text in zip(jobs, clean_html_descriptions([job[field] for job in jobs])):
+            job[field] = text
+
+def collect_jobs(iterator):
+    """Lista completa de un generador de trabajos; None (con el error en stderr) si falla"""
+    try:
+        return list(iterator())
+    except requests.exceptions.HTTPError as e:
+        print(f"Error HTTP: {e}", file=sys.stderr)
+    except ET.ParseError as e:
+        print(f"Error al parsear XML: {e}", file=sys.stderr)
+    except requests.exceptions.RequestException as e:
+        print(f"Error de conexión: {e}", file=sys.stderr)
+    return None
@@ -0,0 +1,72 @@
+from dedup import dedup_jobs, find_duplicate_groups
+
+# Texto común de empresa: las descripciones de distintos puestos se parecen mucho
+BOILERPLATE = (
+    "We are a fully remote company building tools for small businesses across Latin America. "
+    "We offer competitive salary, equity, flexible hours, a yearly learning budget and a home office stipend. "
+    "Our team values ownership, clear written communication and kindness. "
+) * 4
+
+def make_job(title, company, source, id_source, description=BOILERPLATE, **extra):
+    job = {"title": title, "company": company, "description": description,
+           "link": f"https://{source}.example/{id_source}", "source": source, "id_source": id_source}
+    job.update(extra)
+    return job
+
+def test_same_company_different_titles_are_not_merged():
+    jobs = [
+        make_job("Backend Engineer", "Acme", "remotive", "1"),
+        make_job("Product Designer", "Acme", "weworkremotely", "2"),
+    ]
+    assert len(dedup_jobs(jobs)) == 2
+
+def test_unknown_company_does_not_bridge_different_jobs():
+    jobs = [
+        make_job("Senior Backend Engineer", "Empresa no especificada", "aijobs", "1"),
+        make_job("Marketing Manager", "Acme", "remotive", "2"),
+        make_job("Customer Support Lead", "Other Co", "jobicy", "3"),
+    ]
+    assert len(dedup_jobs(jobs)) == 3
+
+def test_group_never_joins_two_known_companies():
+    jobs = [
+        make_job("Backend Engineer", "Empresa no especificada", "aijobs", "1"),
+        make_job("Backend Engineer", "Acme", "remotive", "2"),
+        make_job("Backend Engineer", "Other Co", "jobicy", "3"),
+    ]
+    groups = find_duplicate_groups(jobs)
+    assert not any({1, 2} <= set(group) for group in groups)
+
+def test_same_offer_on_two_portals_is_merged():
+    jobs = [
+        make_job("Backend Engineer at Acme Inc", "Acme Inc", "weworkremotely", "1", category=["Programming"]),
+        make_job("Senior Backend Engineer", "ACME", "remotive", "2", description=BOILERPLATE + " Apply now!",
+                 category=["Software Development"]),
+    ]
+    merged = dedup_jobs(jobs)
+    assert len(merged) == 1
+    assert merged[0]["category"] == ["Programming", "Software Development"]
+    assert merged[0]["duplicates"] == [{"source": "remotive", "link": "https://remotive.example/2", "id_source": "2"}]
+
+def test_same_source_with_different_keys_is_never_merged():
+    jobs = [
+        make_job("Backend Engineer", "Acme", "remotive", "1"),
+        make_job("Backend Engineer", "Acme", "remotive", "2"),
+    ]
+    assert len(dedup_jobs(jobs)) == 2
+
+def test_fingerprint_needs_a_known_company():
+    jobs = [
+        make_job("Developer", "Empresa no especificada", "aijobs", "1", description="Build our app"),
+        make_job("Developer", "Empresa no especificada", "jobicy", "2", description="Sell our product"),
+    ]
+    assert len(dedup_jobs(jobs)) == 2
+
+def test_same_key_in_two_categories_is_merged():
+    jobs = [
+        make_job("Developer", "Empresa no especificada", "jobscollider", "7", category=["software_development"]),
+        make_job("Developer", "Empresa no especificada", "jobscollider", "7", category=["devops"]),
+    ]
+    merged = dedup_jobs(jobs)
+    assert len(merged) == 1
+    assert merged[0]["category"] == ["software_development", "devops"]
@@ -0,0 +1,323 @@
+import functools
+import hashlib
+import html
+import math
+import multiprocessing
+import os
+import re
+import sys
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from html.entities import html5
+from html.parser import HTMLParser
+
+import metrics
+
+# Etiquetas vacías de HTML: no tienen cierre y nunca contienen texto
+EMPTY_ELEMENT_TAGS = frozenset([
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'keygen', 'link',
+    'menuitem', 'meta', 'param', 'source', 'track', 'wbr', 'basefont', 'bgsound',
+    'command', 'frame', 'image', 'isindex', 'nextid', 'spacer'
+])
+# El texto dentro de estas etiquetas no forma parte del contenido visible
+HIDDEN_TEXT_TAGS = frozenset(['script', 'style', 'template', 'rt', 'rp'])
+# Dentro de estas etiquetas los espacios se conservan tal cual
+PRESERVE_WHITESPACE_TAGS = frozenset(['pre', 'textarea'])
+ASCII_SPACES = '\x20\x0a\x09\x0c\x0d'
+
+# Número máximo de textos limpios memorizados (0 desactiva la caché)
+CLEAN_CACHE_SIZE = int(os.getenv("CLEAN_CACHE_SIZE", "20000"))
+# Los textos más cortos se limpian directamente: calcular el hash costaría lo mismo
+CLEAN_CACHE_MIN_LENGTH = int(os.getenv("CLEAN_CACHE_MIN_LENGTH", "64"))
+# Procesos para limpiar descripciones HTML por lotes (0 = todo en el propio proceso)
+CLEAN_PROCESSES = int(os.getenv("CLEAN_PROCESSES", "0"))
+# Por debajo de este número de descripciones sin caché el lote se limpia en el propio proceso
+CLEAN_PARALLEL_MIN = int(os.getenv("CLEAN_PARALLEL_MIN", "200"))
+# Descripciones por envío a un proceso (0 = unos 4 envíos por proceso y lote)
+CLEAN_CHUNK_SIZE = int(os.getenv("CLEAN_CHUNK_SIZE", "0"))
+
+# (función, hash del texto original) -> texto limpio
+_clean_cache = OrderedDict()
+_clean_cache_lock = threading.Lock()
+_clean_cache_stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+_NUMERIC_REFERENCE = {
+    10: re.compile(r"^([0-9]+)(.*)", re.DOTALL),
+    16: re.compile(r"^([0-9a-f]+)(.*)", re.DOTALL),
+}
+
+def _numeric_reference(number):
+    """Carácter de una referencia numérica (&#...;) siguiendo las reglas de HTML5"""
+    if number == 0 or number > 0x10ffff or 0xd800 <= number <= 0xdfff:
+        return "\ufffd"
+    if 0x80 <= number <= 0x9f:
+        # Referencias escritas con la codificación Windows-1252 en lugar de Unicode
+        try:
+            return bytes([number]).decode('cp1252')
+        except UnicodeDecodeError:
+            pass
+    return chr(number)
+
+def _cache_key(name, text):
+    """Clave de caché de un texto, o None si no se memoriza (caché desactivada o texto corto)"""
+    if CLEAN_CACHE_SIZE <= 0 or not text or len(text) < CLEAN_CACHE_MIN_LENGTH:
+        return None
+    return (name, hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest())
+
+def _cache_get(key):
+    with _clean_cache_lock:
+        result = _clean_cache.get(key)
+        if result is not None:
+            _clean_cache.move_to_end(key)
+            _clean_cache_stats["hits"] += 1
+        return result
+
+def _cache_put(key, result):
+    with _clean_cache_lock:
+        _clean_cache_stats["misses"] += 1
+        _clean_cache[key] = result
+        while len(_clean_cache) > CLEAN_CACHE_SIZE:
+            _clean_cache.popitem(last=False)
+            _clean_cache_stats["evictions"] += 1
+
+def _memoized(func):
+    """Memoriza el resultado de una función de limpieza por el hash del texto original.
+
+    Entre dos refrescos de un feed casi todas las descripciones son idénticas,
+    así que solo se paga la limpieza de las ofertas nuevas o editadas.
+    """
+    @functools.wraps(func)
+    def wrapper(text):
+        key = _cache_key(func.__name__, text)
+        if key is None:
+            return func(text)
+        result = _cache_get(key)
+        if result is not None:
+            return result
+        result = func(text)
+        _cache_put(key, result)
+        return result
+    return wrapper
+
+def clean_cache_stats():
+    """Aciertos, fallos, expulsiones y tamaño de la caché de textos limpios"""
+    with _clean_cache_lock:
+        return dict(_clean_cache_stats, size=len(_clean_cache), max_size=CLEAN_CACHE_SIZE)
+
+@_memoized
+def clean_text(text):
+    """Limpia texto: decodifica HTML, normaliza Unicode y preserva saltos de línea"""
+    if not text:
+        return ""
+    text = html.unescape(text)
+    text = unicodedata.normalize('NFC', text)
+    return text.strip()
+
+class _TextExtractor(HTMLParser):
+    """Recorre el HTML una sola vez acumulando los fragmentos de texto visibles.
+
+    Reproduce cómo BeautifulSoup con 'html.parser' divide el texto en cadenas
+    (cada etiqueta, comentario o declaración corta el texto, las cadenas que
+    solo tienen espacios se reducen a ' ' o '\\n'...) pero sin construir el árbol.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.strings = []
+        self.current_data = []
+        self.open_tags = []
+        self.already_closed_empty_element = []
+        self.hidden_depth = 0
+        self.preserve_depth = 0
+
+    def end_data(self, kind='text'):
+        """Cierra la cadena en curso; kind es 'text', 'cdata' o 'hidden' (comentarios, declaraciones...)"""
+        if not self.current_data:
+            return
+        data = "".join(self.current_data)
+        self.current_data = []
+        if not self.preserve_depth and not data.strip(ASCII_SPACES):
+            data = "\n" if "\n" in data else " "
+        # El texto normal dentro de <script>, <style>... no es visible; las secciones CDATA siempre
+        if kind == 'cdata' or (kind == 'text' and not self.hidden_depth):
+            self.strings.append(data)
+
+    def push_tag(self, tag):
+        self.open_tags.append(tag)
+        if tag in HIDDEN_TEXT_TAGS:
+            self.hidden_depth += 1
+        if tag in PRESERVE_WHITESPACE_TAGS:
+            self.preserve_depth += 1
+
+    def pop_to_tag(self, tag):
+        if tag not in self.open_tags:
+            return
+        while self.open_tags:
+            popped = self.open_tags.pop()
+            if popped in HIDDEN_TEXT_TAGS:
+                self.hidden_depth -= 1
+            if popped in PRESERVE_WHITESPACE_TAGS:
+                self.preserve_depth -= 1
+            if popped == tag:
+                return
+
+    def handle_starttag(self, tag, attrs, handle_empty_element=True):
+        self.end_data()
+        self.push_tag(tag)
+        if handle_empty_element and tag in EMPTY_ELEMENT_TAGS:
+            self.handle_endtag(tag, check_already_closed=False)
+            self.already_closed_empty_element.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs, handle_empty_element=False)
+        self.handle_endtag(tag, check_already_closed=False)
+
+    def handle_endtag(self, tag, check_already_closed=True):
+        if check_already_closed and tag in self.already_closed_empty_element:
+            self.already_closed_empty_element.remove(tag)
+            return
+        self.end_data()
+        self.pop_to_tag(tag)
+
+    def handle_data(self, data):
+        self.current_data.append(data)
+
+    def handle_entityref(self, name):
+        # Una entidad desconocida se trata como texto literal ("&foo")
+        self.current_data.append(html5.get(name + ';', '&' + name))
+
+    def handle_charref(self, name):
+        base = 10
+        if name[:1] in ('x', 'X'):
+            name = name[1:]
+            base = 16
+        extra_data = ""
+        try:
+            number = int(name, base)
+        except ValueError:
+            # Referencia sin ';' seguida de texto: el número es la referencia y el resto es texto
+            match = _NUMERIC_REFERENCE[base].match(name)
+            if match is None:
+                self.current_data.append(name)
+                return
+            number = int(match.group(1), base)
+            extra_data = match.group(2)
+        self.current_data.append(_numeric_reference(number))
+        if extra_data:
+            self.current_data.append(extra_data)
+
+    def handle_comment(self, data):
+        self.end_data()
+        self.current_data.append(data)
+        self.end_data('hidden')
+
+    def handle_decl(self, decl):
+        self.end_data()
+        self.current_data.append(decl)
+        self.end_data('hidden')
+
+    def unknown_decl(self, data):
+        # Las secciones CDATA sí son texto visible; el resto de declaraciones no
+        self.end_data()
+        if data.upper().startswith("CDATA["):
+            self.current_data.append(data[len("CDATA["):])
+            self.end_data('cdata')
+        else:
+            self.current_data.append(data)
+            self.end_data('hidden')
+
+    def handle_pi(self, data):
+        self.end_data()
+        self.current_data.append(data)
+        self.end_data('hidden')
+
+def html_to_text(html_text, separator='\n'):
+    """Extrae el texto de un fragmento HTML uniendo cada cadena con separator.
+
+    Equivale a BeautifulSoup(html_text, 'html.parser').get_text(separator=separator)
+    pero en una sola pasada y sin construir el árbol del documento.
+    """
+    extractor = _TextExtractor()
+    extractor.feed(html_text)
+    extractor.close()
+    extractor.end_data()
+    return separator.join(extractor.strings)
+
+def _clean_html(html_text):
+    """clean_html_description sin caché ni métricas (lo que ejecutan los procesos del pool)"""
+    if not html_text:
+        return ""
+    # Se usa la versión sin memorizar para no guardar también el texto intermedio
+    return clean_text.__wrapped__(html_to_text(html_text))
+
+@metrics.timed(metrics.HTML_CLEAN_SECONDS)
+@_memoized
+def clean_html_description(html_text):
+    """Convierte HTML a texto plano preservando saltos de línea"""
+    return _clean_html(html_text)
+
+# número de procesos -> pool; se crean al primer lote grande y duran lo que el proceso
+_pools = {}
+_pools_lock = threading.Lock()
+
+def _get_pool(processes):
+    with _pools_lock:
+        pool = _pools.get(processes)
+        if pool is None:
+            # spawn: hacer fork de un worker con hilos (scheduler, executor) no es seguro
+            pool = _pools[processes] = ProcessPoolExecutor(
+                max_workers=processes, mp_context=multiprocessing.get_context("spawn"))
+        return pool
+
+def _discard_pool(processes, pool):
+    with _pools_lock:
+        if _pools.get(processes) is pool:
+            del _pools[processes]
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def _clean_in_pool(texts, processes):
+    """Limpia texts repartidos en bloques entre procesos; vuelve al propio proceso si el pool falla"""
+    chunksize = CLEAN_CHUNK_SIZE or max(1, math.ceil(len(texts) / (processes * 4)))
+    pool = _get_pool(processes)
+    try:
+        return list(pool.map(_clean_html, texts, chunksize=chunksize))
+    except (BrokenProcessPool, OSError) as e:
+        print(f"Pool de limpieza no disponible, se limpia en el propio proceso: {e!r}", file=sys.stderr)
+        _discard_pool(processes, pool)
+        return [_clean_html(text) for text in texts]
+
+def clean_html_descriptions(texts, processes=None):
+    """clean_html_description de una lista de descripciones, en el mismo orden.
+
+    Las que ya están en la caché no se vuelven a limpiar. Si quedan al menos
+    CLEAN_PARALLEL_MIN y hay procesos configurados (processes, por defecto
+    CLEAN_PROCESSES) se limpian en un pool de procesos para usar todos los
+    núcleos; si no, en el propio proceso.
+    """
+    processes = CLEAN_PROCESSES if processes is None else processes
+    results = [None] * len(texts)
+    pending = []
+    for index, text in enumerate(texts):
+        key = _cache_key("clean_html_description", text)
+        result = _cache_get(key) if key is not None else None
+        if result is None:
+            pending.append((index, key, text))
+        else:
+            results[index] = result
+    if not pending:
+        return results
+
+    pending_texts = [text for _, _, text in pending]
+    parallel = processes > 0 and len(pending) >= CLEAN_PARALLEL_MIN
+    started_at = time.perf_counter()
+    cleaned = _clean_in_pool(pending_texts, processes) if parallel else [_clean_html(text) for text in pending_texts]
+    metrics.HTML_CLEAN_BATCH_SECONDS.observe(time.perf_counter() - started_at, "processes" if parallel else "inline")
+    for (index, key, _), result in zip(pending, cleaned):
+        results[index] = result
+        if key is not None:
+            _cache_put(key, result)
+    return results